@@ -0,0 +1,108 @@
+"""
+Compares Chart.trim against the previous implementation, which resolved every note into linked objects,
+followed hold chains recursively and looked up next notes with tuple.index.
+
+Charts are the largest Groovy charts of an asset directory, or a synthetic chart with holds of up to 20 notes.
+Each chart is trimmed into consecutive windows, and both implementations must give the same notes.
+
+Usage: python benchmarks/chart_trim.py [--assets PATH] [--charts N] [--notes N] [--window SECONDS]
+"""
+
+import argparse
+import dataclasses
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from d4dj_utils.chart.chart import Chart
+from d4dj_utils.chart.synthetic import synthetic_chart
+
+
+def _resolved_trim(chart: Chart, start_time: float, end_time: float) -> Chart:
+    """Chart.trim as it was implemented before note links, with time shifting."""
+    shift = -start_time
+    soflans = tuple(
+        dataclasses.replace(soflan, time=soflan.time + shift)
+        for soflan in chart.soflans
+        if start_time <= soflan.time <= end_time
+    )
+    bar_lines = tuple(
+        bar + shift for bar in chart.bar_lines if start_time <= bar <= end_time
+    )
+    notes = tuple(note.as_resolved() for note in chart.notes)
+    for note in notes:
+        note.finalize(notes)
+    notes = tuple(note for note in notes if note.is_in(start_time, end_time))
+    notes = tuple(note.to_data(notes) for note in notes)
+    notes = tuple(dataclasses.replace(note, time=note.time + shift) for note in notes)
+    return Chart(chart.song, soflans, bar_lines, notes, None)
+
+
+def _asset_charts(path: str, count: int) -> List[Tuple[str, Chart]]:
+    from d4dj_utils.master.asset_manager import AssetManager
+    from d4dj_utils.master.chart_master import ChartDifficulty
+
+    assets = AssetManager(path, lazy=True)
+    charts = [
+        (str(chart_id), chart_mas.load_notes())
+        for chart_id, chart_mas in assets.chart_master.items()
+        if chart_mas.difficulty == ChartDifficulty.Groovy
+        and assets.chart_file_signature(chart_mas.chart_path) is not None
+    ]
+    charts.sort(key=lambda item: -len(item[1].notes))
+    return charts[:count]
+
+
+def _windows(chart: Chart, window: float) -> List[Tuple[float, float]]:
+    end = float(chart.arrays.times.max()) if len(chart.notes) else 0.0
+    return [(start, start + window) for start in range(0, int(end) + 1, int(window))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--assets", help="asset directory to take Groovy charts from")
+    parser.add_argument("--charts", type=int, default=5)
+    parser.add_argument("--notes", type=int, default=20000)
+    parser.add_argument("--window", type=float, default=30.0)
+    args = parser.parse_args()
+
+    if args.assets:
+        charts = _asset_charts(args.assets, args.charts)
+    else:
+        charts = [(f"synthetic {args.notes}", synthetic_chart(args.notes))]
+
+    total_before = total_after = 0.0
+    for name, chart in charts:
+        windows = _windows(chart, args.window)
+        start_time = time.perf_counter()
+        before = [_resolved_trim(chart, start, end) for start, end in windows]
+        before_time = time.perf_counter() - start_time
+        # A new chart, so note links are computed within the timing
+        chart = dataclasses.replace(chart)
+        start_time = time.perf_counter()
+        after = [chart.trim(start, end) for start, end in windows]
+        after_time = time.perf_counter() - start_time
+        for a, b in zip(before, after):
+            if (list(a.notes), a.bar_lines, a.soflans) != (
+                list(b.notes),
+                b.bar_lines,
+                b.soflans,
+            ):
+                raise AssertionError(f"Trimmed charts differ for {name}.")
+        total_before += before_time
+        total_after += after_time
+        print(
+            f"{name}: {len(chart.notes)} notes, {len(windows)} windows, "
+            f"before {before_time:.3f}s, after {after_time:.3f}s"
+        )
+    print(
+        f"total: before {total_before:.3f}s, after {total_after:.3f}s "
+        f"({total_before / max(total_after, 1e-9):.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
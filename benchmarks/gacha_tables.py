@@ -0,0 +1,97 @@
+"""
+Compares reading the tables of every gacha, and formatting every gacha with its tables,
+with gacha tables served from the table_id index
+against the previous approach of one SQLite query per table id.
+
+Usage: python benchmarks/gacha_tables.py <asset path> [--repeat N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Sequence
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from d4dj_utils.master.asset_manager import AssetManager
+from d4dj_utils.master.gacha_table_master import GachaTableMaster
+
+
+def _sqlite_get_tables(
+    assets, table_ids: Sequence[int]
+) -> List[List[GachaTableMaster]]:
+    """The lookup gacha tables used before the index, one query per table id."""
+    gacha_table_master = assets.gacha_table_master
+    cur = assets.db.cursor()
+    return [
+        [
+            gacha_table_master[gtmid[0]]
+            for gtmid in cur.execute(
+                "SELECT id FROM GachaTableMaster WHERE table_id=?", [tid]
+            )
+        ]
+        for tid in table_ids
+    ]
+
+
+def _format_gachas(assets) -> List[str]:
+    return [
+        gacha.one_line_description()
+        + "".join(row.one_line_description() for table in gacha.tables for row in table)
+        for gacha in assets.gacha_master.values()
+    ]
+
+
+def _read_tables(assets) -> list:
+    return [gacha.tables for gacha in assets.gacha_master.values()]
+
+
+def _timed(function):
+    start_time = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start_time
+
+
+def _compare(function, repeat: int):
+    """
+    Runs a function with the index and with queries, alternating so drift affects both equally.
+    Returns both results and the best time of each.
+    """
+    indexed_times = []
+    queried_times = []
+    for _ in range(repeat):
+        indexed, indexed_time = _timed(function)
+        with mock.patch.object(AssetManager, "get_gacha_tables", _sqlite_get_tables):
+            queried, queried_time = _timed(function)
+        indexed_times.append(indexed_time)
+        queried_times.append(queried_time)
+    return indexed, queried, min(indexed_times), min(queried_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="asset directory containing Master")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    assets = AssetManager(args.path)
+    print(
+        f"{len(assets.gacha_master)} gachas, {len(assets.gacha_table_master)} gacha table rows"
+    )
+    for label, function in (("tables", _read_tables), ("formatting", _format_gachas)):
+        indexed, queried, indexed_time, queried_time = _compare(
+            lambda: function(assets), args.repeat
+        )
+        if indexed != queried:
+            raise AssertionError(f"Indexed and queried results differ ({label}).")
+        print(
+            f"{label}: sqlite queries {queried_time * 1000:.2f} ms, "
+            f"table_id index {indexed_time * 1000:.2f} ms "
+            f"({queried_time / indexed_time:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
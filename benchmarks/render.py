@@ -0,0 +1,106 @@
+"""
+Compares the time and peak memory of Chart.render against the numpy rasterizer used by Chart.render(fast=True).
+
+Charts are the largest Groovy charts of an asset directory, or a synthetic chart of taps, slides and short holds.
+Each renderer runs in a new process, and peak memory is the increase in its maximum resident set size
+over that of a process that renders nothing. Peak memory needs the resource module, so is not measured on Windows.
+
+Usage: python benchmarks/render.py [--assets PATH] [--charts N] [--notes N]
+"""
+
+import argparse
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from d4dj_utils.chart.chart import Chart
+from d4dj_utils.chart.synthetic import synthetic_chart
+
+
+def _max_rss_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def _measure_render(chart: Optional[Chart], fast: bool) -> Tuple[float, Optional[int]]:
+    start_time = time.perf_counter()
+    if chart is not None:
+        chart.render(fast=fast)
+    return time.perf_counter() - start_time, _max_rss_bytes()
+
+
+def _benchmark(chart: Chart) -> List[Tuple[float, Optional[int]]]:
+    """Returns the time and peak memory increase of render and rasterize on a chart."""
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for renderer_chart, fast in ((None, False), (chart, False), (chart, True)):
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            results.append(
+                executor.submit(_measure_render, renderer_chart, fast).result()
+            )
+    (_base_time, base_bytes), *renderers = results
+    return [
+        (
+            render_time,
+            max(peak_bytes - base_bytes, 0) if peak_bytes is not None else None,
+        )
+        for render_time, peak_bytes in renderers
+    ]
+
+
+def _asset_charts(path: str, count: int) -> List[Tuple[str, Chart]]:
+    from d4dj_utils.master.asset_manager import AssetManager
+    from d4dj_utils.master.chart_master import ChartDifficulty
+
+    assets = AssetManager(path, lazy=True)
+    charts = [
+        (str(chart_id), chart_mas.load_notes())
+        for chart_id, chart_mas in assets.chart_master.items()
+        if chart_mas.difficulty == ChartDifficulty.Groovy
+        and assets.chart_file_signature(chart_mas.chart_path) is not None
+    ]
+    charts.sort(key=lambda item: -len(item[1].notes))
+    return charts[:count]
+
+
+def _format(result: Tuple[float, Optional[int]]) -> str:
+    render_time, peak_bytes = result
+    if peak_bytes is None:
+        return f"{render_time:.3f}s"
+    return f"{render_time:.3f}s, {peak_bytes / 2 ** 20:.1f} MiB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--assets", help="asset directory to take Groovy charts from")
+    parser.add_argument("--charts", type=int, default=3)
+    parser.add_argument("--notes", type=int, default=4000)
+    args = parser.parse_args()
+
+    if args.assets:
+        charts = _asset_charts(args.assets, args.charts)
+    else:
+        charts = [
+            (f"synthetic {args.notes}", synthetic_chart(args.notes, max_hold_length=5))
+        ]
+
+    for name, chart in charts:
+        render, rasterize = _benchmark(chart)
+        print(
+            f"{name}: {len(chart.notes)} notes, "
+            f"render {_format(render)}, rasterize {_format(rasterize)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+
+# Master rows are dataclasses with slots=True, which was added in Python 3.10
+if sys.version_info < (3, 10):
+    raise ImportError("d4dj_utils requires Python 3.10 or newer.")
@@ -2,12 +2,15 @@ from __future__ import annotations
 
 import dataclasses
 import math
+from collections.abc import Sequence as SequenceABC
 from dataclasses import dataclass
 from enum import Enum
+from functools import cached_property
 from pathlib import Path
-from typing import Optional, Tuple, List, TYPE_CHECKING, Sequence
+from typing import Optional, Tuple, List, TYPE_CHECKING, Sequence, Dict, ClassVar
 
 import msgpack
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
 if TYPE_CHECKING:
@@ -15,6 +18,9 @@ if TYPE_CHECKING:
     from d4dj_utils.master.music_master import MusicMaster
     from d4dj_utils.master.music_mix_master import MusicMixMaster
 
+# Version of the chart renderer. Increment when rendered images change, so existing images are rendered again.
+RENDER_VERSION = 1
+
 
 class SoflanDiskTarget(Enum):
     Left = 1
@@ -35,7 +41,7 @@ class NoteType(Enum):
     Slide = 9
 
 
-@dataclass
+@dataclass(frozen=True)
 class NoteData:
     lane: int
     type: NoteType
@@ -123,7 +129,249 @@ class ResolvedNote:
         )
 
 
-@dataclass
+# Stands in for None in the integer arrays of ChartArrays
+MISSING = np.iinfo(np.int32).min
+
+_NOTE_FIELD_COUNT = 7
+_note_type_values = np.array([note_type.value for note_type in NoteType])
+_note_types_by_value = {note_type.value: note_type for note_type in NoteType}
+
+
+def _optional_int_array(values: Sequence[Optional[int]]) -> np.ndarray:
+    return np.array(
+        [MISSING if value is None else value for value in values], dtype=np.int32
+    )
+
+
+def _optional_value(value):
+    return None if value == MISSING else value
+
+
+def _set_read_only(arrays):
+    """Makes the array fields of a dataclass read-only."""
+    for field in dataclasses.fields(arrays):
+        getattr(arrays, field.name).setflags(write=False)
+
+
+@dataclass(frozen=True)
+class ChartArrays:
+    """
+    Notes of a chart as parallel arrays, in the same order as Chart.notes.
+    Types are NoteType values. Missing values are MISSING, or nan for effect parameters.
+    The arrays are shared by every user of a cached chart, so they are read-only.
+    """
+
+    lanes: np.ndarray
+    types: np.ndarray
+    times: np.ndarray
+    next_ids: np.ndarray
+    directions: np.ndarray
+    effect_types: np.ndarray
+    effect_parameters: np.ndarray
+
+    def __post_init__(self):
+        _set_read_only(self)
+
+    @classmethod
+    def from_serialized(cls, notes: Sequence[Sequence]) -> ChartArrays:
+        """Creates arrays from notes as stored in chart files, without creating NoteData objects."""
+        rows = [
+            (
+                note
+                if len(note) == _NOTE_FIELD_COUNT
+                else [*note, *([None] * (_NOTE_FIELD_COUNT - len(note)))]
+            )
+            for note in notes
+        ]
+        columns = list(zip(*rows)) if rows else [()] * _NOTE_FIELD_COUNT
+        return cls._from_columns(columns)
+
+    @classmethod
+    def from_notes(cls, notes: Sequence[NoteData]) -> ChartArrays:
+        return cls._from_columns(
+            [
+                [note.lane for note in notes],
+                [note.type.value for note in notes],
+                [note.time for note in notes],
+                [note.next_id for note in notes],
+                [note.direction for note in notes],
+                [note.effect_type for note in notes],
+                [note.effect_parameter for note in notes],
+            ]
+        )
+
+    @classmethod
+    def _from_columns(cls, columns) -> ChartArrays:
+        (
+            lanes,
+            types,
+            times,
+            next_ids,
+            directions,
+            effect_types,
+            effect_parameters,
+        ) = columns
+        types = np.array(types, dtype=np.int8)
+        if not np.isin(types, _note_type_values).all():
+            invalid = types[~np.isin(types, _note_type_values)][0]
+            raise ValueError(f"{invalid} is not a valid {NoteType.__name__}")
+        return cls(
+            lanes=np.array(lanes, dtype=np.int32),
+            types=types,
+            times=np.array(times, dtype=np.float64),
+            next_ids=_optional_int_array(next_ids),
+            directions=_optional_int_array(directions),
+            effect_types=_optional_int_array(effect_types),
+            effect_parameters=np.array(
+                [np.nan if value is None else value for value in effect_parameters],
+                dtype=np.float64,
+            ),
+        )
+
+    def __len__(self):
+        return len(self.times)
+
+    def take(self, indexes: np.ndarray) -> ChartArrays:
+        return ChartArrays(
+            *(getattr(self, field.name)[indexes] for field in dataclasses.fields(self))
+        )
+
+    def to_notes(self) -> Tuple[NoteData, ...]:
+        return tuple(
+            NoteData(
+                lane,
+                _note_types_by_value[note_type],
+                time,
+                _optional_value(next_id),
+                _optional_value(direction),
+                _optional_value(effect_type),
+                None if math.isnan(effect_parameter) else effect_parameter,
+            )
+            for lane, note_type, time, next_id, direction, effect_type, effect_parameter in zip(
+                self.lanes.tolist(),
+                self.types.tolist(),
+                self.times.tolist(),
+                self.next_ids.tolist(),
+                self.directions.tolist(),
+                self.effect_types.tolist(),
+                self.effect_parameters.tolist(),
+            )
+        )
+
+
+_single_note_type_values = np.array(
+    [note_type.value for note_type in ResolvedNote._single_note_types]
+)
+
+
+def _chain_ends(links: np.ndarray) -> np.ndarray:
+    """Follows links from every note until a note without a link, by pointer jumping."""
+    ends = np.where(links >= 0, links, np.arange(len(links)))
+    for _ in range(len(links).bit_length()):
+        ends = ends[ends]
+    return ends
+
+
+@dataclass(frozen=True)
+class NoteLinks:
+    """
+    Links between the notes of a chart, as indexes into its notes, or -1 where there is no link.
+    Matches ResolvedNote: a next id of 0 means no next note,
+    and a note linked to by several notes has the last of them as its previous note.
+    Heads and tails are the notes reached by following previous and next links to the end.
+    The arrays are read-only, like those of ChartArrays.
+    """
+
+    next: np.ndarray
+    prev: np.ndarray
+    heads: np.ndarray
+    tails: np.ndarray
+
+    def __post_init__(self):
+        _set_read_only(self)
+
+    @classmethod
+    def from_arrays(cls, arrays: ChartArrays) -> NoteLinks:
+        count = len(arrays)
+        indexes = np.arange(count)
+        next_ids = arrays.next_ids.astype(np.int64)
+        has_next = (next_ids != MISSING) & (next_ids != 0)
+        if np.any(has_next & ((next_ids < -count) | (next_ids >= count))):
+            raise IndexError("Note next id out of range.")
+        next_indexes = np.where(has_next, next_ids % max(count, 1), -1)
+        prev_indexes = np.full(count, -1, dtype=np.int64)
+        np.maximum.at(prev_indexes, next_indexes[has_next], indexes[has_next])
+        return cls(
+            next=next_indexes,
+            prev=prev_indexes,
+            heads=_chain_ends(prev_indexes),
+            tails=_chain_ends(next_indexes),
+        )
+
+    def trim_masks(
+        self, arrays: ChartArrays, windows: Sequence[Tuple[float, float]]
+    ) -> np.ndarray:
+        """
+        Returns which notes are kept when trimming to each of the given (start, end) windows,
+        as ResolvedNote.is_in does, with one row per window.
+        """
+        times = arrays.times
+        types = arrays.types
+        bounds = np.array(windows, dtype=np.float64).reshape(-1, 2)
+        in_range = (bounds[:, :1] <= times) & (times <= bounds[:, 1:])
+        single = np.isin(types, _single_note_type_values)
+        slide = types == NoteType.Slide.value
+        hold = ~single & ~slide
+        if np.any(hold & ((self.next[self.tails] >= 0) | (self.prev[self.heads] >= 0))):
+            raise RecursionError("Hold notes form a cycle.")
+        has_prev = self.prev >= 0
+        has_next = self.next >= 0
+        linked_in_range = (has_prev & in_range[:, self.prev]) | (
+            has_next & in_range[:, self.next]
+        )
+        slide_mask = in_range & ((arrays.directions != 0) | linked_in_range)
+        hold_mask = in_range[:, self.heads] & in_range[:, self.tails]
+        return np.where(single, in_range, np.where(slide, slide_mask, hold_mask))
+
+
+class NoteList(SequenceABC):
+    """
+    Immutable sequence of the notes of a chart, backed by ChartArrays.
+    NoteData objects are only created when notes are first accessed individually,
+    so the length and arrays of a chart are available without them.
+    """
+
+    def __init__(self, arrays: ChartArrays):
+        self.arrays = arrays
+        self._notes: Optional[Tuple[NoteData, ...]] = None
+
+    @property
+    def notes(self) -> Tuple[NoteData, ...]:
+        if self._notes is None:
+            self._notes = self.arrays.to_notes()
+        return self._notes
+
+    def __getitem__(self, index):
+        return self.notes[index]
+
+    def __len__(self):
+        return len(self.arrays)
+
+    def __iter__(self):
+        return iter(self.notes)
+
+    def __eq__(self, other):
+        if isinstance(other, NoteList):
+            other = other.notes
+        elif isinstance(other, list):
+            other = tuple(other)
+        return self.notes == other
+
+    def __repr__(self):
+        return repr(self.notes)
+
+
+@dataclass(frozen=True)
 class SoflanData:
     time: float
     velocity: float
@@ -136,7 +384,7 @@ class SoflanData:
         return cls(*args)
 
 
-@dataclass
+@dataclass(frozen=True)
 class ChartCommonData:
     sd_rhythm_times: Sequence[float]
     skill_times: Sequence[float]
@@ -172,7 +420,7 @@ class ChartCommonData:
         return get_skill_times(skill_times, start_time, end_time)
 
 
-@dataclass
+@dataclass(frozen=True)
 class ChartInfo:
     start_time: float
     end_time: float
@@ -185,6 +433,20 @@ class ChartInfo:
 
 
 @dataclass
+class ChartStatistics:
+    note_count: int
+    note_counts: Dict[str, int]
+    duration: float
+    notes_per_second: Tuple[int, ...]
+    peak_density: int
+    peak_density_time: float
+    lane_counts: Tuple[int, ...]
+
+    # Length in seconds of the window used for peak density
+    density_window: ClassVar[float] = 1.0
+
+
+@dataclass(frozen=True)
 class Chart:
     song: str
     soflans: Sequence[SoflanData]
@@ -196,9 +458,40 @@ class Chart:
     def from_msgpack(cls, data: bytes, info: Optional[ChartInfo]):
         data = msgpack.unpackb(data)
         data[1] = [SoflanData.from_serialized(sof) for sof in data[1]]
-        data[3] = [NoteData.from_serialized(note) for note in data[3]]
+        data[3] = NoteList(ChartArrays.from_serialized(data[3]))
         return cls(*data[0:4], info=info)
 
+    @cached_property
+    def arrays(self) -> ChartArrays:
+        """
+        The notes of this chart as arrays.
+        This is computed once, so it does not reflect later changes to notes.
+        """
+        if isinstance(self.notes, NoteList):
+            return self.notes.arrays
+        return ChartArrays.from_notes(self.notes)
+
+    @cached_property
+    def note_links(self) -> NoteLinks:
+        return NoteLinks.from_arrays(self.arrays)
+
+    def _trim_notes(self, mask: np.ndarray, shift: float) -> Tuple[NoteData, ...]:
+        """Returns the notes selected by a mask, with next ids remapped to the selected notes."""
+        arrays = self.arrays
+        next_indexes = self.note_links.next
+        new_indexes = np.cumsum(mask) - 1
+        kept = np.flatnonzero(mask)
+        kept_next = next_indexes[kept]
+        next_ids = np.where(
+            (kept_next >= 0) & mask[kept_next], new_indexes[kept_next], MISSING
+        )
+        trimmed = dataclasses.replace(
+            arrays.take(kept),
+            times=arrays.times[kept] + shift,
+            next_ids=next_ids.astype(np.int32),
+        )
+        return trimmed.to_notes()
+
     @classmethod
     def create_mix(
         cls,
@@ -213,24 +506,31 @@ class Chart:
         return create_mix(songs, diffs, mix_masters)
 
     def trim(self, start_time: float, end_time: float, shift_time: bool = True):
-        shift = -start_time if shift_time else 0
-        soflans = tuple(
-            dataclasses.replace(soflan, time=soflan.time + shift)
-            for soflan in self.soflans
-            if start_time <= soflan.time <= end_time
-        )
-        bar_lines = tuple(
-            bar + shift for bar in self.bar_lines if start_time <= bar <= end_time
-        )
-        notes = tuple(note.as_resolved() for note in self.notes)
-        for note in notes:
-            note.finalize(notes)
-        notes = tuple(note for note in notes if note.is_in(start_time, end_time))
-        notes = tuple(note.to_data(notes) for note in notes)
-        notes = tuple(
-            dataclasses.replace(note, time=note.time + shift) for note in notes
-        )
-        return Chart(self.song, soflans, bar_lines, notes, None)
+        return self.trim_many([(start_time, end_time)], shift_time)[0]
+
+    def trim_many(
+        self, windows: Sequence[Tuple[float, float]], shift_time: bool = True
+    ) -> List[Chart]:
+        """Trims the chart to each of the given (start, end) windows, resolving note links only once."""
+        masks = self.note_links.trim_masks(self.arrays, windows)
+        charts = []
+        for (start_time, end_time), mask in zip(windows, masks):
+            shift = -start_time if shift_time else 0
+            soflans = tuple(
+                dataclasses.replace(soflan, time=soflan.time + shift)
+                for soflan in self.soflans
+                if start_time <= soflan.time <= end_time
+            )
+            bar_lines = tuple(
+                bar + shift for bar in self.bar_lines if start_time <= bar <= end_time
+            )
+            notes = tuple(self._trim_notes(mask, shift))
+            charts.append(Chart(self.song, soflans, bar_lines, notes, None))
+        return charts
+
+    def count_trimmed_notes(self, windows: Sequence[Tuple[float, float]]) -> List[int]:
+        """Returns the number of notes trim would keep for each of the given (start, end) windows."""
+        return self.note_links.trim_masks(self.arrays, windows).sum(axis=1).tolist()
 
     def get_note_counts(self):
         counts = {
@@ -252,44 +552,89 @@ class Chart:
             "slide_flick": 0,
         }
 
-        for note in self.notes:
-            if note.type == NoteType.Tap1:
-                counts["tap"] += 1
-                counts["tap1"] += 1
-            elif note.type == NoteType.Tap2:
-                counts["tap"] += 1
-                counts["tap2"] += 1
-            elif note.type == NoteType.ScratchLeft:
-                counts["scratch"] += 1
-                counts["scratch_left"] += 1
-            elif note.type == NoteType.StopStart:
-                counts["stop"] += 1
-                counts["stop_start"] += 1
-            elif note.type == NoteType.StopEnd:
-                counts["stop"] += 1
-                counts["stop_end"] += 1
-            elif note.type == NoteType.ScratchRight:
-                counts["scratch"] += 1
-                counts["scratch_right"] += 1
-            elif note.type == NoteType.LongStart:
-                counts["long"] += 1
-                counts["long_start"] += 1
-            elif note.type == NoteType.LongMiddle:
-                counts["long"] += 1
-                counts["long_middle"] += 1
-            elif note.type == NoteType.LongEnd:
-                counts["long"] += 1
-                counts["long_end"] += 1
-            elif note.type == NoteType.Slide:
-                counts["slide"] += 1
-                if note.direction:
-                    counts["slide_flick"] += 1
-                else:
-                    counts["slide_tick"] += 1
+        arrays = self.arrays
+        type_counts = np.bincount(arrays.types, minlength=len(NoteType))
+        for key, note_type in (
+            ("tap1", NoteType.Tap1),
+            ("tap2", NoteType.Tap2),
+            ("scratch_left", NoteType.ScratchLeft),
+            ("scratch_right", NoteType.ScratchRight),
+            ("stop_start", NoteType.StopStart),
+            ("stop_end", NoteType.StopEnd),
+            ("long_start", NoteType.LongStart),
+            ("long_middle", NoteType.LongMiddle),
+            ("long_end", NoteType.LongEnd),
+        ):
+            counts[key] = int(type_counts[note_type.value])
+        counts["tap"] = counts["tap1"] + counts["tap2"]
+        counts["scratch"] = counts["scratch_left"] + counts["scratch_right"]
+        counts["stop"] = counts["stop_start"] + counts["stop_end"]
+        counts["long"] = (
+            counts["long_start"] + counts["long_middle"] + counts["long_end"]
+        )
+        counts["slide"] = int(type_counts[NoteType.Slide.value])
+        counts["slide_flick"] = int(
+            np.count_nonzero(
+                (arrays.types == NoteType.Slide.value)
+                & (arrays.directions != 0)
+                & (arrays.directions != MISSING)
+            )
+        )
+        counts["slide_tick"] = counts["slide"] - counts["slide_flick"]
 
         return counts
 
-    def render(self) -> Image:
+    def get_notes_per_second(self, bin_seconds: float = 1.0) -> np.ndarray:
+        """Returns the number of notes in each consecutive bin of the given length, starting at time 0."""
+        times = self.arrays.times
+        if not len(times):
+            return np.zeros(0, dtype=np.int64)
+        bins = np.maximum(np.floor(times / bin_seconds).astype(np.int64), 0)
+        return np.bincount(bins)
+
+    def get_peak_density(self, window: float = 1.0) -> Tuple[int, float]:
+        """
+        Returns the largest number of notes in any window of the given length,
+        along with the time of the first note in that window.
+        """
+        times = np.sort(self.arrays.times)
+        if not len(times):
+            return 0, 0.0
+        counts = np.searchsorted(times, times + window, side="left") - np.arange(
+            len(times)
+        )
+        index = int(np.argmax(counts))
+        return int(counts[index]), float(times[index])
+
+    def get_lane_counts(self) -> np.ndarray:
+        return np.bincount(self.arrays.lanes, minlength=7)
+
+    def get_statistics(self) -> ChartStatistics:
+        times = self.arrays.times
+        peak_density, peak_density_time = self.get_peak_density(
+            ChartStatistics.density_window
+        )
+        return ChartStatistics(
+            note_count=len(times),
+            note_counts=self.get_note_counts(),
+            duration=float(times.max()) if len(times) else 0.0,
+            notes_per_second=tuple(self.get_notes_per_second().tolist()),
+            peak_density=peak_density,
+            peak_density_time=peak_density_time,
+            lane_counts=tuple(self.get_lane_counts().tolist()),
+        )
+
+    def render(self, fast: bool = False) -> Image:
+        """
+        Renders the chart as columns of notes.
+        If fast is set, the chart is drawn with the numpy rasterizer instead,
+        which is quicker and uses less memory, but is not pixel identical.
+        """
+        if fast:
+            from d4dj_utils.chart.rasterizer import rasterize
+
+            return rasterize(self)
+
         if not self.notes:
             return Image.new("RGBA", (1, 1))
 
@@ -321,9 +666,7 @@ class Chart:
         if self.info:
             height = int(self.info.end_time * height_per_second + 2 * padding)
         else:
-            height = int(
-                max(note.time for note in self.notes) * height_per_second + 2 * padding
-            )
+            height = int(self.arrays.times.max() * height_per_second + 2 * padding)
         img = Image.new("RGBA", (width, height))
         draw = ImageDraw.Draw(img)
 
@@ -385,8 +728,15 @@ class Chart:
                 t * height_per_second + padding
             )
 
-        def note_center(note: NoteData):
-            return center_coordinate_at(note.time, note.lane)
+        arrays = self.arrays
+        lanes = arrays.lanes.tolist()
+        note_types = [_note_types_by_value[value] for value in arrays.types.tolist()]
+        times = arrays.times.tolist()
+        next_ids = arrays.next_ids.tolist()
+        directions = [_optional_value(value) for value in arrays.directions.tolist()]
+
+        def note_center(index: int):
+            return center_coordinate_at(times[index], lanes[index])
 
         if self.info:
             # Groovy start/end lines
@@ -516,21 +866,20 @@ class Chart:
         long_types = {NoteType.LongStart, NoteType.LongMiddle, NoteType.LongEnd}
 
         # Slide and hold connectors, and flick indicators
-        for note in self.notes:
-            if note.next_id is not None and note.next_id > 0:
-                next_note = self.notes[note.next_id]
-
-                if note.type in hold_types:
+        for index, note_type in enumerate(note_types):
+            next_id = next_ids[index]
+            if next_id != MISSING and next_id > 0:
+                if note_type in hold_types:
                     hold_width = 0.75 * lane_width
                 else:
                     hold_width = 0.2 * lane_width
 
-                color = tuple(math.floor(c * 0.8) for c in note_colors[note.type])
+                color = tuple(math.floor(c * 0.8) for c in note_colors[note_type])
 
-                if note.type in hold_types:  # Long and stop connector
+                if note_type in hold_types:  # Long and stop connector
                     half_width = math.ceil(hold_width) / 2
-                    x1, y1 = note_center(note)
-                    x2, y2 = note_center(next_note)
+                    x1, y1 = note_center(index)
+                    x2, y2 = note_center(next_id)
                     draw.polygon(
                         (
                             x1 - half_width,
@@ -546,20 +895,22 @@ class Chart:
                     )
                 else:  # Slide connector
                     draw.line(
-                        (note_center(note), note_center(next_note)),
+                        (note_center(index), note_center(next_id)),
                         fill=color,
                         width=math.ceil(hold_width),
                     )
 
             # Flick triangle
-            if note.type == NoteType.Slide:
-                if note.direction != 0:
-                    color = tuple(math.floor(c * 0.8) for c in note_colors[note.type])
-                    cx, cy = note_center(note)
+            if note_type == NoteType.Slide:
+                if directions[index] != 0:
+                    color = tuple(math.floor(c * 0.8) for c in note_colors[note_type])
+                    cx, cy = note_center(index)
                     xy = (
                         cx,
                         cy - lane_width * 0.3,
-                        center_coordinate_at(note.time, note.lane + note.direction)[0],
+                        center_coordinate_at(
+                            times[index], lanes[index] + directions[index]
+                        )[0],
                         cy,
                         cx,
                         cy + lane_width * 0.3,
@@ -567,10 +918,10 @@ class Chart:
                     draw.polygon(xy, fill=color)
 
         # Main notes
-        for note in self.notes:
-            cx, cy = note_center(note)
-            color = note_colors[note.type]
-            if note.type in tap_types or note.type in long_types:  # Middle notes
+        for index, note_type in enumerate(note_types):
+            cx, cy = note_center(index)
+            color = note_colors[note_type]
+            if note_type in tap_types or note_type in long_types:  # Middle notes
                 xy = (
                     cx - lane_width * 0.6,
                     cy - lane_width * 0.1,
@@ -578,7 +929,7 @@ class Chart:
                     cy + lane_width * 0.1,
                 )
                 draw.rectangle(xy, fill=color)
-            elif note.type in scratch_types or note.type in stop_types:  # Disc notes
+            elif note_type in scratch_types or note_type in stop_types:  # Disc notes
                 xy = (
                     cx - lane_width * 0.6,
                     cy - lane_width * 0.6,
@@ -586,7 +937,7 @@ class Chart:
                     cy + lane_width * 0.6,
                 )
                 draw.ellipse(xy, fill=color)
-            elif note.type == NoteType.Slide:  # Slide
+            elif note_type == NoteType.Slide:  # Slide
                 xy = (
                     cx - lane_width * 0.2,
                     cy - lane_width * 0.5,
@@ -607,8 +958,7 @@ class Chart:
         if self.info:
             start_time = self.info.start_time
         for time, is_bar in sorted(
-            [(note.time, False) for note in self.notes]
-            + [(bar, True) for bar in self.bar_lines]
+            [(time, False) for time in times] + [(bar, True) for bar in self.bar_lines]
         ):
             if not is_bar:
                 combo_count += 1
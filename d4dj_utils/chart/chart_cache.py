@@ -0,0 +1,83 @@
+import dataclasses
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclasses.dataclass
+class ChartCacheStats:
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self):
+        return (
+            f"hits: {self.hits}, misses: {self.misses}, hit rate: {self.hit_rate:.1%}, "
+            f"size: {self.size}/{self.max_size}"
+        )
+
+
+def freeze(value: Any) -> Any:
+    """Converts lists in a (possibly nested) dataclass to tuples, so it can be shared safely."""
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        changes = {
+            field.name: frozen
+            for field in dataclasses.fields(value)
+            if (frozen := freeze(getattr(value, field.name)))
+            is not getattr(value, field.name)
+        }
+        return dataclasses.replace(value, **changes) if changes else value
+    return value
+
+
+class ChartCache:
+    """
+    Bounded LRU cache of parsed charts and common data.
+    Keys should identify the version of the source files, such as their paths and mtimes,
+    so that changed files are parsed again. Values are frozen before they are stored,
+    since the same object is returned to every caller.
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._values: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, load: Callable[[], T]) -> T:
+        with self._lock:
+            if key in self._values:
+                self.hits += 1
+                self._values.move_to_end(key)
+                return self._values[key]
+            self.misses += 1
+        value = freeze(load())
+        if self.max_size > 0:
+            with self._lock:
+                self._values[key] = value
+                self._values.move_to_end(key)
+                while len(self._values) > self.max_size:
+                    self._values.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def stats(self) -> ChartCacheStats:
+        return ChartCacheStats(self.hits, self.misses, len(self._values), self.max_size)
@@ -0,0 +1,570 @@
+from __future__ import annotations
+
+import math
+from pathlib import Path
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from d4dj_utils.chart.chart import MISSING, NoteType
+
+if TYPE_CHECKING:
+    from d4dj_utils.chart.chart import Chart
+
+# Same layout and colors as Chart.render, in supersampled pixels
+_SUPER_SCALE = 2
+_WIDTH = 380 * _SUPER_SCALE
+_HEIGHT_PER_SECOND = 150 * _SUPER_SCALE
+_PADDING = 50 * _SUPER_SCALE
+_LANE_WIDTH = 25 * _SUPER_SCALE
+_LANE_SEPARATOR_WIDTH = 2 * _SUPER_SCALE
+_BARLINE_WIDTH = 1 * _SUPER_SCALE
+_FONT_SIZE = 32 * _SUPER_SCALE
+_MAX_HEIGHT = 150 * 10 * _SUPER_SCALE
+_LEFT_CUT = math.ceil(_WIDTH / 2 - _LANE_WIDTH * 3.8)
+_RIGHT_PAD = 30
+
+_note_colors = {
+    NoteType.Tap1: (15, 20, 220),
+    NoteType.Tap2: (90, 120, 255),
+    NoteType.ScratchLeft: (255, 165, 0),
+    NoteType.ScratchRight: (255, 165, 0),
+    NoteType.StopStart: (255, 0, 0),
+    NoteType.StopEnd: (255, 0, 0),
+    NoteType.LongStart: (255, 223, 0),
+    NoteType.LongMiddle: (255, 233, 0),
+    NoteType.LongEnd: (255, 233, 0),
+    NoteType.Slide: (255, 0, 255),
+}
+_colors_by_value = np.zeros((max(t.value for t in NoteType) + 1, 3), dtype=np.uint8)
+for _note_type, _color in _note_colors.items():
+    _colors_by_value[_note_type.value] = _color
+_connector_colors_by_value = np.floor(_colors_by_value * 0.8).astype(np.uint8)
+
+_bar_types = {
+    NoteType.Tap1,
+    NoteType.Tap2,
+    NoteType.LongStart,
+    NoteType.LongMiddle,
+    NoteType.LongEnd,
+}
+_disc_types = {
+    NoteType.ScratchLeft,
+    NoteType.ScratchRight,
+    NoteType.StopStart,
+    NoteType.StopEnd,
+}
+_hold_types = {
+    NoteType.StopStart,
+    NoteType.StopEnd,
+    NoteType.LongStart,
+    NoteType.LongMiddle,
+    NoteType.LongEnd,
+}
+
+
+def _pack(colors) -> np.ndarray:
+    """Packs RGB colors into RGBX values, as stored in little endian uint32 pixels."""
+    colors = np.asarray(colors, dtype=np.uint32)
+    return colors[..., 0] | colors[..., 1] << 8 | colors[..., 2] << 16
+
+
+def _values(note_types) -> List[int]:
+    return [note_type.value for note_type in note_types]
+
+
+def _ranges(starts: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the concatenation of range(start, start + count), and the index of the range of each value."""
+    owners = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets, owners
+
+
+class _Rects:
+    """
+    Axis aligned rectangles as (top, bottom, left, right) in global pixels, all inclusive.
+    If alpha is given, out of 255, rectangles are blended with what is below them.
+    """
+
+    def __init__(self, boxes, colors, alpha: Optional[int] = None):
+        self.boxes = np.round(np.array(boxes, dtype=np.float64).reshape(-1, 4))
+        self.boxes = self.boxes.astype(np.int64)
+        self.boxes[:, :2].sort(axis=1)
+        self.boxes[:, 2:].sort(axis=1)
+        self.colors = np.array(colors, dtype=np.uint8).reshape(-1, 3)
+        self.alpha = alpha
+
+    def draw(self, column: _Column):
+        boxes = self.boxes
+        visible = (boxes[:, 1] >= column.visible_top) & (boxes[:, 0] < column.bottom)
+        for (top, bottom, left, right), color in zip(
+            boxes[visible].tolist(), self.colors[visible]
+        ):
+            rows = slice(
+                max(top, column.visible_top) - column.top,
+                min(bottom + 1, column.bottom) - column.top,
+            )
+            columns = slice(max(left - _LEFT_CUT, 0), max(right + 1 - _LEFT_CUT, 0))
+            if self.alpha is None:
+                column.pixels[rows, columns] = _pack(color)
+            else:
+                region = column.channels[rows, columns, :3]
+                region[:] = (
+                    region * (255 - self.alpha) + color.astype(np.uint16) * self.alpha
+                ) // 255
+
+
+class _Spans:
+    """
+    Horizontal runs of pixels (row, left, right) in global pixels, inclusive, each with a color.
+    Spans are sorted by row, then by their keys, which give the drawing order of spans in the same row.
+    """
+
+    def __init__(self, rows, lefts, rights, colors, keys):
+        self.rows = np.round(rows).astype(np.int64)
+        self.lefts = np.round(lefts).astype(np.int64)
+        self.rights = np.round(rights).astype(np.int64)
+        self.colors = _pack(colors)
+        self.keys = np.asarray(keys, dtype=np.int64)
+        self._sort()
+
+    def _sort(self):
+        order = np.lexsort((self.keys, self.rows))
+        for name in ("rows", "lefts", "rights", "colors", "keys"):
+            setattr(self, name, getattr(self, name)[order])
+
+    @classmethod
+    def concatenate(cls, spans: List[_Spans]) -> _Spans:
+        result = cls.__new__(cls)
+        for name in ("rows", "lefts", "rights", "colors", "keys"):
+            setattr(
+                result, name, np.concatenate([getattr(span, name) for span in spans])
+            )
+        result._sort()
+        return result
+
+    def draw(self, column: _Column):
+        start, end = np.searchsorted(self.rows, [column.visible_top, column.bottom])
+        rows = self.rows[start:end] - column.top
+        lefts = np.maximum(self.lefts[start:end] - _LEFT_CUT, 0)
+        rights = np.minimum(self.rights[start:end] - _LEFT_CUT, column.width - 1)
+        colors = self.colors[start:end]
+        visible = lefts <= rights
+        rows, lefts, rights = rows[visible], lefts[visible], rights[visible]
+        colors = colors[visible]
+        counts = rights - lefts + 1
+        pixels, owners = _ranges(rows * column.width + lefts, counts)
+        column.pixels.reshape(-1)[pixels] = colors[owners]
+
+
+class _Column:
+    """
+    A column of the output image at supersampled resolution, covering global rows [top, bottom).
+    Pixels are packed RGBX values, and only rows from visible_top, which excludes rows above the chart, are drawn.
+    """
+
+    def __init__(self, top: int, bottom: int, background: Optional[np.ndarray] = None):
+        self.width = _WIDTH - _LEFT_CUT
+        self.top = top
+        self.visible_top = max(top, 0)
+        self.bottom = bottom
+        self.pixels = np.zeros((bottom - top, self.width), dtype=np.uint32)
+        if background is not None:
+            self.pixels[self.visible_top - top :] = background
+
+    @property
+    def channels(self) -> np.ndarray:
+        return self.pixels.view(np.uint8).reshape(*self.pixels.shape, 4)
+
+    def to_image(self) -> Image:
+        return Image.frombuffer(
+            "RGB",
+            (self.width, len(self.pixels)),
+            self.pixels,
+            "raw",
+            "RGBX",
+            0,
+            1,
+        )
+
+
+def _lane_background() -> np.ndarray:
+    """Returns a row of the lanes, both middle and disc, and the vertical lane separators, which fill every row."""
+
+    def lane_x(lanes: float) -> float:
+        return lanes * _LANE_WIDTH + _WIDTH / 2
+
+    separators = [
+        (
+            0,
+            0,
+            lane_x(i - 3.5) - _LANE_SEPARATOR_WIDTH // 2,
+            lane_x(i - 3.5) - _LANE_SEPARATOR_WIDTH // 2 + _LANE_SEPARATOR_WIDTH - 1,
+        )
+        for i in range(8)
+    ]
+    row = _Column(0, 1)
+    _Rects(
+        [
+            (0, 0, lane_x(-3.5), lane_x(3.5)),
+            (0, 0, lane_x(-3.5), lane_x(-2.5)),
+            (0, 0, lane_x(2.5), lane_x(3.5)),
+            *separators,
+        ],
+        [(30, 30, 30), (60, 60, 60), (60, 60, 60)] + [(127, 127, 127)] * 8,
+    ).draw(row)
+    return row.pixels[0]
+
+
+def _stencil_spans(
+    centers_x, centers_y, dy: np.ndarray, half_widths, colors, keys, x_offsets=0
+) -> _Spans:
+    """
+    Spans of a shape drawn at each center, given the rows of the shape relative to its center,
+    the half width of each row, and optionally the offset of the middle of each row.
+    Half widths and offsets may differ per shape, with one row per center.
+    """
+    rows = np.round(centers_y)[:, None] + dy
+    middles = centers_x[:, None] + x_offsets
+    return _Spans(
+        rows.ravel(),
+        np.broadcast_to(middles - half_widths, rows.shape).ravel(),
+        np.broadcast_to(middles + half_widths, rows.shape).ravel(),
+        np.repeat(colors, len(dy), axis=0),
+        np.repeat(keys, len(dy)),
+    )
+
+
+def _shape_rows(half_height: float) -> np.ndarray:
+    return np.arange(-math.floor(half_height), math.floor(half_height) + 1)
+
+
+def _ellipse_half_widths(half_width: float, half_height: float) -> np.ndarray:
+    dy = _shape_rows(half_height)
+    return half_width * np.sqrt(np.clip(1 - (dy / half_height) ** 2, 0, None))
+
+
+def _connector_spans(x1, y1, x2, y2, half_widths, colors, keys) -> _Spans:
+    """Spans of thick segments from (x1, y1) to (x2, y2), with the given horizontal half width of each."""
+    top = np.round(np.minimum(y1, y2)).astype(np.int64)
+    bottom = np.round(np.maximum(y1, y2)).astype(np.int64)
+    rows, owners = _ranges(top, bottom - top + 1)
+    x1, y1, x2, y2 = x1[owners], y1[owners], x2[owners], y2[owners]
+    dy = y2 - y1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.clip(np.where(dy != 0, (rows - y1) / dy, 0.5), 0, 1)
+    centers = x1 + t * (x2 - x1)
+    half_widths = np.where(
+        dy != 0, half_widths[owners], half_widths[owners] + np.abs(x2 - x1) / 2
+    )
+    return _Spans(
+        rows,
+        centers - half_widths,
+        centers + half_widths,
+        colors[owners],
+        keys[owners],
+    )
+
+
+def _build_note_layers(chart: Chart, height: int) -> List[_Spans]:
+    arrays = chart.arrays
+    lanes = arrays.lanes.astype(np.float64)
+    types = arrays.types.astype(np.int64)
+    xs = _LANE_WIDTH * (lanes - 3) + _WIDTH / 2
+    ys = height - (arrays.times * _HEIGHT_PER_SECOND + _PADDING)
+    colors = _colors_by_value[types]
+    connector_colors = _connector_colors_by_value[types]
+
+    # Slide and hold connectors, and flick indicators
+    next_ids = arrays.next_ids.astype(np.int64)
+    connected = np.flatnonzero((next_ids > 0) & (next_ids < len(next_ids)))
+    targets = next_ids[connected]
+    is_hold = np.isin(types[connected], _values(_hold_types))
+    hold_half_width = math.ceil(0.75 * _LANE_WIDTH) / 2
+    slide_half_width = math.ceil(0.2 * _LANE_WIDTH) / 2
+    dx = xs[targets] - xs[connected]
+    dy = ys[targets] - ys[connected]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slide_half_widths = np.where(
+            dy != 0,
+            np.minimum(
+                slide_half_width * np.hypot(dx, dy) / np.abs(dy),
+                np.abs(dx) / 2 + slide_half_width,
+            ),
+            slide_half_width,
+        )
+    connectors = _connector_spans(
+        xs[connected],
+        ys[connected],
+        xs[targets],
+        ys[targets],
+        np.where(is_hold, hold_half_width, slide_half_widths),
+        connector_colors[connected],
+        2 * connected,
+    )
+
+    directions = arrays.directions.astype(np.int64)
+    flicks = np.flatnonzero(
+        (types == NoteType.Slide.value) & (directions != 0) & (directions != MISSING)
+    )
+    flick_half_height = _LANE_WIDTH * 0.3
+    flick_rows = _shape_rows(flick_half_height)
+    # Each row of a flick triangle runs from the note towards the lane it points to
+    flick_lengths = (
+        _LANE_WIDTH
+        * directions[flicks, None]
+        * (1 - np.abs(flick_rows) / flick_half_height)
+    )
+    flick_spans = _stencil_spans(
+        xs[flicks],
+        ys[flicks],
+        flick_rows,
+        np.abs(flick_lengths) / 2,
+        connector_colors[flicks],
+        2 * flicks + 1,
+        x_offsets=flick_lengths / 2,
+    )
+
+    # Main notes
+    bars = np.flatnonzero(np.isin(types, _values(_bar_types)))
+    discs = np.flatnonzero(np.isin(types, _values(_disc_types)))
+    slides = np.flatnonzero(types == NoteType.Slide.value)
+    bar_half_height = _LANE_WIDTH * 0.1
+    notes = _Spans.concatenate(
+        [
+            _stencil_spans(
+                xs[bars],
+                ys[bars],
+                _shape_rows(bar_half_height),
+                _LANE_WIDTH * 0.6,
+                colors[bars],
+                bars,
+            ),
+            _stencil_spans(
+                xs[discs],
+                ys[discs],
+                _shape_rows(_LANE_WIDTH * 0.6),
+                _ellipse_half_widths(_LANE_WIDTH * 0.6, _LANE_WIDTH * 0.6),
+                colors[discs],
+                discs,
+            ),
+            _stencil_spans(
+                xs[slides],
+                ys[slides],
+                _shape_rows(_LANE_WIDTH * 0.5),
+                _ellipse_half_widths(_LANE_WIDTH * 0.2, _LANE_WIDTH * 0.5),
+                colors[slides],
+                slides,
+            ),
+        ]
+    )
+    return [_Spans.concatenate([connectors, flick_spans]), notes]
+
+
+def _build_background_layers(chart: Chart, height: int) -> List[_Rects]:
+    def y_at(t: float) -> float:
+        return height - (t * _HEIGHT_PER_SECOND + _PADDING)
+
+    def lane_x(lanes: float) -> float:
+        return lanes * _LANE_WIDTH + _WIDTH / 2
+
+    def horizontal_lines(ys, color, line_width):
+        ys = np.asarray(ys, dtype=np.float64)
+        top = np.round(ys) - line_width // 2
+        return _Rects(
+            np.stack(
+                [
+                    top,
+                    top + line_width - 1,
+                    np.zeros_like(ys),
+                    np.full_like(ys, _WIDTH - 1),
+                ],
+                axis=1,
+            ),
+            np.tile(color, (len(ys), 1)),
+        )
+
+    info = chart.info
+    layers = []
+    if info:
+        # Groovy, which shows at the sides of the lanes
+        fever_start_y = y_at(info.fever_start)
+        fever_end_y = y_at(info.fever_end)
+        layers.append(
+            _Rects(
+                [
+                    (fever_start_y, fever_end_y, lane_x(-3.8), lane_x(-3.5) - 1),
+                    (fever_start_y, fever_end_y, lane_x(3.5) + 1, lane_x(3.8)),
+                ],
+                [(0, 200, 150)] * 2,
+            )
+        )
+    # Start and end lines
+    layers.append(horizontal_lines([_PADDING], (150, 150, 150), _BARLINE_WIDTH))
+    end_y = (
+        height - int(info.start_time * _HEIGHT_PER_SECOND) - _PADDING
+        if info
+        else height - _PADDING
+    )
+    layers.append(horizontal_lines([end_y], (90, 90, 90), _BARLINE_WIDTH))
+
+    if info:
+        # Groovy start/end lines
+        layers.append(
+            horizontal_lines(
+                [y_at(info.fever_start), y_at(info.fever_end)],
+                (0, 200, 150),
+                9 * _BARLINE_WIDTH,
+            )
+        )
+
+        # Skill areas and bars
+        skill_boxes = []
+        skill_colors = []
+        bar_ys = []
+        end_bar_ys = []
+        skill_bars = info.skill_times
+        for i, bar_time in enumerate(skill_bars):
+            bar_y = y_at(bar_time)
+            end_bar_y = bar_y - 9 * _HEIGHT_PER_SECOND
+            if i < 4 and end_bar_y < y_at(skill_bars[i + 1]):
+                # Next skill overlaps
+                end_bar_y = y_at(skill_bars[i + 1])
+            skill_boxes += [
+                (bar_y, end_bar_y, lane_x(-3.5), lane_x(-2.5)),
+                (bar_y, end_bar_y, lane_x(2.5), lane_x(3.5)),
+            ]
+            skill_colors += [(255, 255, 255)] * 2
+            bar_ys.append(bar_y)
+            end_bar_ys.append(end_bar_y)
+        layers.append(_Rects(skill_boxes, skill_colors, alpha=70))
+        layers.append(
+            _Rects(
+                [
+                    (bar_y, end_bar_y, lane_x(-2.5), lane_x(2.5))
+                    for bar_y, end_bar_y in zip(bar_ys, end_bar_ys)
+                ],
+                [(255, 255, 255)] * len(bar_ys),
+                alpha=10,
+            )
+        )
+        layers.append(horizontal_lines(bar_ys, (212, 17, 89), 6 * _BARLINE_WIDTH))
+        layers.append(horizontal_lines(end_bar_ys, (26, 133, 255), 6 * _BARLINE_WIDTH))
+
+        # Medley transition lines
+        layers.append(
+            horizontal_lines(
+                [y_at(t) for t in info.medley_transition_times],
+                (160, 40, 180),
+                3 * _BARLINE_WIDTH,
+            )
+        )
+
+    # Bar lines
+    layers.append(
+        horizontal_lines(
+            [y_at(t) for t in chart.bar_lines], (180, 180, 180), _BARLINE_WIDTH
+        )
+    )
+    return layers
+
+
+def _number_labels(chart: Chart, height: int) -> List[Tuple[float, str, tuple, str]]:
+    """Returns the combo and bar number labels as (y, text, color, anchor)."""
+    start_time = chart.info.start_time if chart.info else 0
+    times = np.sort(chart.arrays.times)
+    bar_times = sorted(chart.bar_lines)
+    combo_counts = np.searchsorted(times, bar_times, side="right").tolist()
+    labels = []
+    for bar_count, (bar_time, combo_count) in enumerate(
+        zip(bar_times, combo_counts), 1
+    ):
+        text_y = height - (bar_time * _HEIGHT_PER_SECOND + _PADDING)
+        text_padding = _FONT_SIZE / 8
+        combo_anchor_y = text_y - text_padding
+        bar_anchor_y = text_y + text_padding
+
+        # Prevent cut off text at the top/bottom
+        combo_anchor_dist = (
+            -(height - combo_anchor_y - start_time * _HEIGHT_PER_SECOND) % _MAX_HEIGHT
+        )
+        bar_anchor_dist = (
+            height - bar_anchor_y - start_time * _HEIGHT_PER_SECOND
+        ) % _MAX_HEIGHT
+        if combo_anchor_dist < _FONT_SIZE:
+            combo_anchor_y -= combo_anchor_dist + text_padding
+        if bar_anchor_dist < _FONT_SIZE:
+            bar_anchor_y += bar_anchor_dist + text_padding
+        labels.append((combo_anchor_y, str(combo_count), (255, 255, 127), "lb"))
+        labels.append((bar_anchor_y, str(bar_count), (255, 200, 200), "lt"))
+    return labels
+
+
+def rasterize(chart: Chart) -> Image:
+    """
+    Renders a chart like Chart.render, drawing each column of the output directly.
+    Notes and connectors are rasterized in batches as horizontal pixel runs with numpy,
+    so no full height intermediate images are created.
+    The output has the same layout and colors, but is not pixel identical.
+    """
+    if not len(chart.notes):
+        return Image.new("RGBA", (1, 1))
+
+    info = chart.info
+    if info:
+        height = int(info.end_time * _HEIGHT_PER_SECOND + 2 * _PADDING)
+    else:
+        height = int(chart.arrays.times.max() * _HEIGHT_PER_SECOND + 2 * _PADDING)
+    layers = _build_background_layers(chart, height) + _build_note_layers(chart, height)
+    background = _lane_background()
+    labels = _number_labels(chart, height)
+    label_ys = np.array([y for y, _text, _color, _anchor in labels])
+    font = ImageFont.truetype(
+        str(Path(__file__).parent / "RobotoMono-SemiBold.ttf"),
+        _FONT_SIZE // _SUPER_SCALE,
+    )
+
+    # Cut out part before chart start
+    if info:
+        height = round(height - info.start_time * _HEIGHT_PER_SECOND)
+    column_height = min(_MAX_HEIGHT, height)
+    column_count = math.ceil(height / column_height)
+    padded_width = _WIDTH - _LEFT_CUT + _RIGHT_PAD
+    result = Image.new(
+        "RGB",
+        (
+            padded_width * column_count // _SUPER_SCALE,
+            column_height // _SUPER_SCALE,
+        ),
+    )
+    draw = ImageDraw.Draw(result)
+    for i in range(column_count):
+        top = height - column_height * (i + 1)
+        column = _Column(top, height - column_height * i, background)
+        for layer in layers:
+            layer.draw(column)
+        result.paste(
+            column.to_image().reduce(_SUPER_SCALE),
+            (padded_width * i // _SUPER_SCALE, 0),
+        )
+        # Combo and bar numbers, drawn at the output resolution.
+        # Numbers that cross the edge of a column are drawn in both columns, and clipped by the image.
+        visible = np.flatnonzero(
+            (label_ys > top - 2 * _FONT_SIZE)
+            & (label_ys < column.bottom + 2 * _FONT_SIZE)
+        )
+        for index in visible.tolist():
+            y, text, color, anchor = labels[index]
+            draw.text(
+                (
+                    (padded_width * i + 3.8 * _LANE_WIDTH + _WIDTH / 2 + 4 - _LEFT_CUT)
+                    / _SUPER_SCALE,
+                    (y - top) / _SUPER_SCALE,
+                ),
+                text,
+                font=font,
+                fill=color,
+                anchor=anchor,
+            )
+    return result
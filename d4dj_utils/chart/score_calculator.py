@@ -1,11 +1,14 @@
 import heapq
-import math
 import struct
 from collections import defaultdict
 from dataclasses import dataclass
+from functools import cached_property, partial
 from typing import Callable, List, Optional, Union, Sequence, NamedTuple, Dict, Tuple
 
-from d4dj_utils.chart.chart import NoteData, Chart
+import msgpack
+import numpy as np
+
+from d4dj_utils.chart.chart import Chart
 from d4dj_utils.master.chart_master import ChartMaster
 from d4dj_utils.master.skill_master import SkillMaster
 
@@ -68,6 +71,11 @@ def f32(n: float) -> float:
     return struct.unpack("f", struct.pack("f", n))[0]
 
 
+def f32_array(n: np.ndarray) -> np.ndarray:
+    """Rounds each value to the nearest float32, like f32, keeping the float64 dtype."""
+    return np.asarray(n, dtype=np.float64).astype(np.float32).astype(np.float64)
+
+
 class ChartScoringData:
     def __init__(
         self,
@@ -93,30 +101,99 @@ class ChartScoringData:
         accuracy: float = 1.0,
         combo_bonus_multiplier: Union[float, bool] = 1.0,
     ) -> float:
+        skill_matrix = np.array(
+            [[[s.score_up_rate, s.perfect_score_up_rate] for s in skills]],
+            dtype=np.float64,
+        ).reshape(1, len(skills), 2)
+        return int(
+            self.score_many(
+                [power],
+                skill_matrix,
+                fever_score_up=fever_score_up,
+                passive_score_up=passive_score_up,
+                auto_score_up=auto_score_up,
+                manual_score_up=manual_score_up,
+                enable_fever=enable_fever,
+                disable_soflan=disable_soflan,
+                autoplay=autoplay,
+                accuracy=accuracy,
+                combo_bonus_multiplier=combo_bonus_multiplier,
+            )[0]
+        )
+
+    def score_many(
+        self,
+        powers: Sequence[int],
+        skill_matrix: np.ndarray,
+        fever_score_up: float = 0.0,
+        passive_score_up: float = 0.0,
+        auto_score_up: float = 0.0,
+        manual_score_up: float = 0.0,
+        enable_fever: bool = True,
+        disable_soflan: bool = False,
+        autoplay: bool = False,
+        accuracy: float = 1.0,
+        combo_bonus_multiplier: Union[float, bool] = 1.0,
+    ) -> np.ndarray:
+        """
+        Scores many teams at once, with the same results as calling score for each team.
+        skill_matrix has shape (teams, skills, 2), holding the score up rate and perfect score up rate
+        of each skill of each team, in the order of the skills passed to get_chart_scoring_data.
+        Returns the scores as an int64 array.
+        """
+        powers = np.asarray(powers, dtype=np.int64)
+        skill_matrix = np.asarray(skill_matrix, dtype=np.float64)
+        if skill_matrix.ndim != 3 or skill_matrix.shape[2] != 2:
+            raise ValueError("Expected a skill matrix of shape (teams, skills, 2).")
+        if len(powers) != len(skill_matrix):
+            raise ValueError("Expected one power per team.")
+        fever_active, combo_multiplier, skill_indexes, counts = self._entry_arrays
+        # Like indexing a list of skills, rather than silently scoring an out of range skill as zero
+        if skill_indexes.size and skill_indexes.max() >= skill_matrix.shape[1]:
+            raise IndexError(
+                f"Scoring data uses skill {skill_indexes.max()}, but only {skill_matrix.shape[1]} skills were given."
+            )
+
         if autoplay:
             combo_bonus_multiplier = 0.0
         else:
             combo_bonus_multiplier = f32(combo_bonus_multiplier)
-        base_score = self.base_score(power)
+        unique_powers, power_indexes = np.unique(powers, return_inverse=True)
+        base_scores = np.array(
+            [self.base_score(power) for power in unique_powers.tolist()],
+            dtype=np.float64,
+        )[power_indexes]
         fever_multiplier = (
             f32(self.fever_multiplier * f32(1.0 + fever_score_up))
             if enable_fever
             else 1.0
         )
-        data = self.data
-        total_score = 0
-        for (fever_active, combo_multiplier, active_skills), count in data.items():
-            active_skills = [skills[i] for i in active_skills]
-            score_up_rate = sum(s.score_up_rate for s in active_skills)
-            if autoplay:
-                perfect_score_up_rate = 0
-            else:
-                perfect_score_up_rate = sum(
-                    s.perfect_score_up_rate for s in active_skills
+        combo_multiplier = f32_array(
+            f32_array(f32_array(combo_multiplier - 1.0) * combo_bonus_multiplier) + 1.0
+        )
+
+        # Missing skills (-1) select an appended column of zero rates
+        score_up_rates = np.zeros((len(powers), skill_matrix.shape[1] + 1))
+        score_up_rates[:, :-1] = skill_matrix[:, :, 0]
+        perfect_score_up_rates = np.zeros_like(score_up_rates)
+        if not autoplay:
+            perfect_score_up_rates[:, :-1] = skill_matrix[:, :, 1]
+
+        scores = np.empty(len(powers), dtype=np.int64)
+        chunk_size = max(1, _score_chunk_elements // max(1, len(counts)))
+        for start in range(0, len(powers), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            # Rates are summed in skill order, as the total can depend on the order of additions
+            score_up_rate = np.zeros((len(base_scores[chunk]), len(counts)))
+            perfect_score_up_rate = np.zeros_like(score_up_rate)
+            for column in skill_indexes.T:
+                score_up_rate = score_up_rate + score_up_rates[chunk, column]
+                perfect_score_up_rate = (
+                    perfect_score_up_rate + perfect_score_up_rates[chunk, column]
                 )
             if accuracy == 1.0:
-                multiplier = f32(
-                    f32((score_up_rate + perfect_score_up_rate) * 0.01) + 1.0
+                multiplier = f32_array(
+                    f32_array((score_up_rate + perfect_score_up_rate) * 0.01) + 1.0
                 )
             else:
                 # At this point, exact accuracy is not important, so f32 doesn't matter.
@@ -127,24 +204,50 @@ class ChartScoringData:
                 multiplier = (
                     accuracy * perfect_multiplier + (1 - accuracy) * great_multiplier
                 )
-            if fever_active:
-                multiplier = f32(multiplier * fever_multiplier)
+            multiplier = np.where(
+                fever_active, f32_array(multiplier * fever_multiplier), multiplier
+            )
             if disable_soflan:
-                multiplier = f32(multiplier * disable_soflan_multiplier)
-            multiplier = f32(multiplier * f32(1.0 + passive_score_up))
+                multiplier = f32_array(multiplier * disable_soflan_multiplier)
+            multiplier = f32_array(multiplier * f32(1.0 + passive_score_up))
             if autoplay:
-                multiplier = f32(
-                    f32(multiplier * f32(1.0 + auto_score_up)) * autoplay_multiplier
+                multiplier = f32_array(
+                    f32_array(multiplier * f32(1.0 + auto_score_up))
+                    * autoplay_multiplier
                 )
             else:
-                multiplier = f32(multiplier * f32(1.0 + manual_score_up))
-            combo_multiplier = f32(
-                f32(f32(combo_multiplier - 1.0) * combo_bonus_multiplier) + 1.0
-            )
-            score = math.floor(f32(f32(combo_multiplier * base_score) * multiplier))
-            total_score += score * count
-        return total_score
+                multiplier = f32_array(multiplier * f32(1.0 + manual_score_up))
+            entry_scores = np.floor(
+                f32_array(
+                    f32_array(combo_multiplier * base_scores[chunk, None]) * multiplier
+                )
+            ).astype(np.int64)
+            scores[chunk] = entry_scores @ counts
+        return scores
+
+    @cached_property
+    def _entry_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The fever states, combo multipliers, active skill indexes (padded with -1) and counts of the entries.
+        Built on first use, so data should not be modified after scoring.
+        """
+        entries = list(self.data.items())
+        width = max((len(entry.skills) for entry, _count in entries), default=0)
+        skill_indexes = np.full((len(entries), width), -1, dtype=np.intp)
+        for row, (entry, _count) in enumerate(entries):
+            skill_indexes[row, : len(entry.skills)] = entry.skills
+        return (
+            np.array([entry.fever_active for entry, _count in entries], dtype=bool),
+            np.array(
+                [entry.combo_multiplier for entry, _count in entries], dtype=np.float64
+            ),
+            skill_indexes,
+            np.array([count for _entry, count in entries], dtype=np.int64),
+        )
+
 
+# Approximate number of team and entry pairs scored at once by score_many
+_score_chunk_elements = 1 << 18
 
 autoplay_multiplier = f32(17 / 20)
 disable_soflan_multiplier = f32(20 / 21)
@@ -162,6 +265,11 @@ combo_multipliers = (
     + [1.10] * 100
     + [1.11]
 )
+_combo_multiplier_array = np.array(combo_multipliers)
+# Distinct combo multipliers, and the index of the multiplier at each combo up to 700
+_combo_tiers, _combo_tier_indexes = np.unique(
+    _combo_multiplier_array, return_inverse=True
+)
 
 
 class ScoringDataEntry(NamedTuple):
@@ -170,74 +278,133 @@ class ScoringDataEntry(NamedTuple):
     skills: Tuple[int, ...]
 
 
-def get_chart_scoring_data(
-    chart: Chart, skill_durations: Sequence[float]
-) -> ChartScoringData:
-    tl = Timeline()
-    tl.active_skills = set()
-    tl.combo = 0
-    tl.fever_active = False
-
-    def base_score(power: int):
-        return f32(
-            f32(1 + f32(0.01 * f32(f32(chart.info.level) - 5)))
-            * f32(power * 3)
-            / len(chart.notes)
-        )
+def chart_base_score(level: float, note_count: int, power: int) -> float:
+    """The score of a single note before multipliers, for a chart of the given level and note count."""
+    return f32(f32(1 + f32(0.01 * f32(f32(level) - 5))) * f32(power * 3) / note_count)
 
-    data = defaultdict(int)
 
-    def add_skill_callback(index: int, time: float):
-        def start_cb(_tl):
-            tl.active_skills.add(index)
+# Version of the scoring data simulation, included in cache keys so stored tables are recomputed when it changes
+SCORING_VERSION = 2
 
-        def end_cb(_tl):
-            tl.active_skills.remove(index)
 
-        tl.add(time, start_cb)
-        tl.add(time + skill_durations[index], end_cb)
+@dataclass(frozen=True)
+class ChartScoringTable:
+    """
+    The inputs of ChartScoringData in a form that can be stored:
+    the chart level and note count the base score is derived from,
+    the fever multiplier and the number of notes in each scoring state.
+    """
 
-    skill_bars = chart.info.skill_times
-    for index, skill_bar in enumerate(skill_bars):
-        add_skill_callback(index, skill_bar)
+    level: float
+    note_count: int
+    fever_multiplier: float
+    data: "Dict[ScoringDataEntry, int]"
 
-    def enable_fever_cb(_tl):
-        tl.fever_active = True
+    def to_scoring_data(self) -> ChartScoringData:
+        return ChartScoringData(
+            partial(chart_base_score, self.level, self.note_count),
+            self.fever_multiplier,
+            self.data,
+        )
 
-    def disable_fever_cb(_tl):
-        tl.fever_active = False
+    def to_msgpack(self) -> bytes:
+        return msgpack.packb(
+            [
+                self.level,
+                self.note_count,
+                self.fever_multiplier,
+                [
+                    [entry.fever_active, entry.combo_multiplier, entry.skills, count]
+                    for entry, count in self.data.items()
+                ],
+            ]
+        )
+
+    @classmethod
+    def from_msgpack(cls, data: bytes) -> "ChartScoringTable":
+        level, note_count, fever_multiplier, entries = msgpack.unpackb(data)
+        return cls(
+            level,
+            note_count,
+            fever_multiplier,
+            {
+                ScoringDataEntry(fever_active, combo_multiplier, tuple(skills)): count
+                for fever_active, combo_multiplier, skills, count in entries
+            },
+        )
 
-    tl.add(chart.info.fever_start, enable_fever_cb)
-    tl.add(chart.info.fever_end, disable_fever_cb)
 
+def get_chart_scoring_data(
+    chart: Chart, skill_durations: Sequence[float]
+) -> ChartScoringData:
+    return get_chart_scoring_table(chart, skill_durations).to_scoring_data()
+
+
+def get_chart_scoring_table(
+    chart: Chart, skill_durations: Sequence[float]
+) -> ChartScoringTable:
+    # Skill and fever changes, in the order a Timeline would run them
+    events = []
+    for index, skill_bar in enumerate(chart.info.skill_times):
+        events.append((skill_bar, "skill_start", index))
+        events.append((skill_bar + skill_durations[index], "skill_end", index))
+    events.append((chart.info.fever_start, "fever", True))
+    events.append((chart.info.fever_end, "fever", False))
+    events.sort(key=lambda event: event[0])
+
+    # Fever state and active skills after each number of events
+    active_skills = set()
+    fever_active = False
+    states = [(fever_active, ())]
+    for _time, kind, value in events:
+        if kind == "skill_start":
+            active_skills.add(value)
+        elif kind == "skill_end":
+            active_skills.remove(value)
+        else:
+            fever_active = value
+        states.append((fever_active, tuple(sorted(active_skills))))
+
+    times = chart.arrays.times
     fever_multiplier = 1.0
-    if n_fever_notes := sum(
-        1
-        for n in chart.notes
-        if chart.info.fever_start <= n.time < chart.info.fever_end
+    if n_fever_notes := int(
+        np.count_nonzero(
+            (chart.info.fever_start <= times) & (times < chart.info.fever_end)
+        )
     ):
         fever_note_fraction = f32(n_fever_notes / len(chart.notes))
         fever_multiplier = f32(f32(0.28 / fever_note_fraction) ** 0.6)
         fever_multiplier = f32(max(1.1, min(2 * fever_multiplier, 5.0)))
 
-    def add_note_callback(note: NoteData):
-        def note_cb(_tl):
-            combo_multiplier = combo_multipliers[min(tl.combo, 700)]
-            entry = ScoringDataEntry(
-                fever_active=tl.fever_active,
-                combo_multiplier=combo_multiplier,
-                skills=tuple(sorted(tl.active_skills)),
-            )
-            data[entry] += 1
-            tl.combo += 1
-
-        tl.add(note.time, note_cb)
-
-    for note in chart.notes:
-        add_note_callback(note)
+    # Notes run after events at the same time, since events are added to the timeline first
+    note_times = times[np.argsort(times, kind="stable")]
+    state_indexes = np.searchsorted(
+        np.array([time for time, _kind, _value in events], dtype=np.float64),
+        note_times,
+        side="right",
+    )
+    tiers = _combo_tier_indexes[np.minimum(np.arange(len(note_times)), 700)]
+    keys, first_indexes, counts = np.unique(
+        state_indexes * len(_combo_tiers) + tiers,
+        return_index=True,
+        return_counts=True,
+    )
+    # Entries are added in order of their first note, as the timeline would
+    order = np.argsort(first_indexes)
+    data = defaultdict(int)
+    for key, count in zip(keys[order].tolist(), counts[order].tolist()):
+        state_index, tier = divmod(key, len(_combo_tiers))
+        fever_active, skills = states[state_index]
+        entry = ScoringDataEntry(
+            fever_active=fever_active,
+            combo_multiplier=_combo_tiers[tier].item(),
+            skills=skills,
+        )
+        data[entry] += count
 
-    tl.run()
-    return ChartScoringData(base_score, fever_multiplier, data)
+    return ChartScoringTable(
+        chart.info.level, len(chart.notes), fever_multiplier, dict(data)
+    )
 
 
 def calculate_score(
@@ -259,50 +426,54 @@ def calculate_score(
     if autoplay:
         enable_combo_bonus = False
 
-    timeline = Timeline()
-    timeline.active_skill_index = -1
-    timeline.score = 0
-    timeline.combo = 0
-    timeline.fever_active = False
-    timeline.fever_multiplier = 1.0
-
     base_score = (1 + 0.01 * (chart.info.level - 5)) * power * 3 / len(chart.notes)
 
-    def add_skill_callback(index: int, time: float):
-        def start_cb(_tl):
-            timeline.active_skill_index = index
-
-        def end_cb(_tl):
-            if timeline.active_skill_index == index:
-                timeline.active_skill_index = -1
-
-        timeline.add(time, start_cb)
-        timeline.add(time + skills[index].max_seconds, end_cb)
-
-    skill_bars = chart.info.skill_times
-    for index, skill_bar in enumerate(skill_bars):
-        add_skill_callback(index, skill_bar)
+    # Skill and fever changes, in the order a Timeline would run them
+    events = []
+    for index, skill_bar in enumerate(chart.info.skill_times):
+        events.append((skill_bar, "skill_start", index))
+        events.append((skill_bar + skills[index].max_seconds, "skill_end", index))
 
+    times = chart.arrays.times
+    fever_multiplier = 1.0
     if enable_fever:
-
-        def enable_fever_cb(_tl):
-            timeline.fever_active = True
-
-        def disable_fever_cb(_tl):
-            timeline.fever_active = False
-
-        timeline.add(chart.info.fever_start, enable_fever_cb)
-        timeline.add(chart.info.fever_end, disable_fever_cb)
-
-        if n_fever_notes := sum(
-            1
-            for n in chart.notes
-            if chart.info.fever_start <= n.time < chart.info.fever_end
+        events.append((chart.info.fever_start, "fever", True))
+        events.append((chart.info.fever_end, "fever", False))
+        if n_fever_notes := int(
+            np.count_nonzero(
+                (chart.info.fever_start <= times) & (times < chart.info.fever_end)
+            )
         ):
             fever_note_fraction = n_fever_notes / len(chart.notes)
             fever_multiplier = (0.28 / fever_note_fraction) ** 0.6
             fever_multiplier = max(1.1, min(2 * fever_multiplier, 5.0))
-            timeline.fever_multiplier = fever_multiplier
+    events.sort(key=lambda event: event[0])
+
+    # State after each number of events
+    active_skill_index = -1
+    fever_active = False
+    skill_states = [active_skill_index]
+    fever_states = [fever_active]
+    for _time, kind, value in events:
+        if kind == "skill_start":
+            active_skill_index = value
+        elif kind == "skill_end":
+            if active_skill_index == value:
+                active_skill_index = -1
+        else:
+            fever_active = value
+        skill_states.append(active_skill_index)
+        fever_states.append(fever_active)
+
+    # Notes run after events at the same time, since events are added to the timeline first
+    note_times = times[np.argsort(times, kind="stable")]
+    event_counts = np.searchsorted(
+        np.array([time for time, _kind, _value in events], dtype=np.float64),
+        note_times,
+        side="right",
+    )
+    note_skills = np.array(skill_states)[event_counts]
+    note_fever = np.array(fever_states)[event_counts]
 
     base_multiplier = 1
     if disable_soflan:
@@ -310,51 +481,43 @@ def calculate_score(
     if autoplay:
         base_multiplier *= autoplay_multiplier
 
-    def add_note_callback(note: NoteData):
-        def note_cb(_tl):
-            multiplier = base_multiplier
-
-            if enable_combo_bonus:
-                multiplier *= combo_multipliers[min(timeline.combo, 700)]
-
-            if timeline.fever_active:
-                multiplier *= timeline.fever_multiplier
+    multipliers = np.full(len(note_times), base_multiplier, dtype=np.float64)
+    if enable_combo_bonus:
+        combos = np.minimum(np.arange(len(note_times)), 700)
+        multipliers = base_multiplier * _combo_multiplier_array[combos]
+    multipliers = np.where(note_fever, multipliers * fever_multiplier, multipliers)
 
-            if autoplay:
-                if timeline.active_skill_index != -1:
-                    skill = skills[timeline.active_skill_index]
-                    timeline.score += math.floor(
-                        multiplier * (1 + skill.score_up_rate / 100) * base_score
-                    )
-                else:
-                    timeline.score += math.floor(multiplier * base_score)
-            else:
-                if timeline.active_skill_index != -1:
-                    skill = skills[timeline.active_skill_index]
-                    timeline.score += accuracy * math.floor(
-                        base_score
-                        * multiplier
-                        * (
-                            1
-                            + skill.perfect_score_up_rate / 100
-                            + skill.score_up_rate / 100
-                        )
-                    )
-                    timeline.score += (1 - accuracy) * math.floor(
-                        0.9 * base_score * multiplier * (1 + skill.score_up_rate / 100)
-                    )
-                else:
-                    timeline.score += accuracy * math.floor(base_score * multiplier)
-                    timeline.score += (1 - accuracy) * math.floor(
-                        0.9 * base_score * multiplier
-                    )
-            if not autoplay:
-                timeline.combo += 1
-
-        timeline.add(note.time, note_cb)
-
-    for note in chart.notes:
-        add_note_callback(note)
-
-    timeline.run()
-    return timeline.score
+    has_skill = note_skills != -1
+    score_up_factors = np.array(
+        [1 + skill.score_up_rate / 100 for skill in skills] + [1.0]
+    )[note_skills]
+    if autoplay:
+        scores = np.where(
+            has_skill,
+            np.floor(multipliers * score_up_factors * base_score),
+            np.floor(multipliers * base_score),
+        )
+        return int(scores.astype(np.int64).sum())
+
+    perfect_factors = np.array(
+        [
+            1 + skill.perfect_score_up_rate / 100 + skill.score_up_rate / 100
+            for skill in skills
+        ]
+        + [1.0]
+    )[note_skills]
+    perfect_scores = np.where(
+        has_skill,
+        np.floor(base_score * multipliers * perfect_factors),
+        np.floor(base_score * multipliers),
+    )
+    great_scores = np.where(
+        has_skill,
+        np.floor(0.9 * base_score * multipliers * score_up_factors),
+        np.floor(0.9 * base_score * multipliers),
+    )
+    # Added one at a time in note order, as the float total depends on the order of additions
+    terms = np.empty(2 * len(note_times))
+    terms[0::2] = accuracy * perfect_scores
+    terms[1::2] = (1 - accuracy) * great_scores
+    return float(np.cumsum(terms)[-1])
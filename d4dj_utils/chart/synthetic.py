@@ -0,0 +1,47 @@
+import random
+
+import msgpack
+
+from d4dj_utils.chart.chart import Chart, NoteType
+
+
+def synthetic_chart(
+    note_count: int,
+    seed: int = 1,
+    max_gap: float = 0.1,
+    max_hold_length: int = 20,
+) -> Chart:
+    """
+    A chart of random taps, scratches, slides, flicks and holds, for benchmarks and tests.
+    Notes are up to max_gap seconds apart, and half of them share the time of the previous note, like chords.
+    Holds have 2 to max_hold_length notes half a second apart, and bar lines are a second apart.
+    The chart has no chart info.
+    """
+    rng = random.Random(seed)
+    notes = []
+    time = 0.0
+    while len(notes) < note_count:
+        time += rng.choice([0.0, rng.random() * max_gap])
+        lane = rng.randint(0, 6)
+        kind = rng.random()
+        if kind < 0.6:
+            notes.append([lane, rng.randint(0, 3), time, 0, 0, None, None])
+        elif kind < 0.8:
+            direction = rng.choice([0, 0, 1, -1])
+            notes.append([lane, NoteType.Slide.value, time, 0, direction, None, None])
+        else:
+            length = rng.randint(2, max_hold_length)
+            start = len(notes)
+            for i in range(length):
+                note_type = (
+                    NoteType.LongStart
+                    if i == 0
+                    else NoteType.LongEnd if i == length - 1 else NoteType.LongMiddle
+                )
+                next_id = start + i + 1 if i < length - 1 else 0
+                notes.append(
+                    [lane, note_type.value, time + i * 0.5, next_id, 0, None, None]
+                )
+    end_time = max((note[2] for note in notes), default=0.0)
+    bar_lines = [float(i) for i in range(int(end_time) + 2)]
+    return Chart.from_msgpack(msgpack.packb(["synthetic", [], bar_lines, notes]), None)
@@ -6,7 +6,7 @@ from d4dj_utils.master.common_enums import EventType
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class AchievementMaster(MasterAsset):
     id: int
     group_id: int
@@ -21,6 +21,8 @@ class AchievementMaster(MasterAsset):
     is_hidden: bool
     notify_type_id: int
 
+    columnar = True
+
     def __hash__(self):
         return self.id.__hash__()
 
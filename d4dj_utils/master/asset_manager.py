@@ -1,242 +1,447 @@
+from __future__ import annotations
+
 import dataclasses
+import functools
+import hashlib
+import importlib
 import inspect
+import itertools
 import logging
 import sqlite3
+import sys
+import tracemalloc
 import textwrap
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Type, Dict, Tuple, Optional
+from typing import (
+    Type,
+    Dict,
+    Tuple,
+    Optional,
+    TYPE_CHECKING,
+    Any,
+    List,
+    Iterator,
+    Sequence,
+)
 
 import lz4.block
 import msgpack
 import pytz
 
 import d4dj_utils.master.master_asset as ma
-from d4dj_utils.chart.chart import Chart
+import d4dj_utils.master.event_index as ei
+from d4dj_utils.master.chart_archive import (
+    ChartArchive,
+    chart_file_id,
+    write_chart_archive,
+)
+from d4dj_utils.master.master_snapshot import MasterSnapshot, Signature, file_signature
+from d4dj_utils.master.render_manifest import RenderManifest
+from d4dj_utils.master.scoring_table_store import (
+    ScoringTables,
+    ScoringTableStore,
+    write_scoring_tables,
+)
+from d4dj_utils.chart.chart import RENDER_VERSION, Chart, ChartStatistics
+from d4dj_utils.chart.chart_cache import ChartCache
 
+if TYPE_CHECKING:
+    from d4dj_utils.master.achievement_master import AchievementMaster
+    from d4dj_utils.master.attribute_master import AttributeMaster
+    from d4dj_utils.master.card_exp_master import CardExpMaster
+    from d4dj_utils.master.card_master import CardAvailability, CardMaster
+    from d4dj_utils.master.character_master import CharacterMaster
+    from d4dj_utils.master.chart_designer_master import ChartDesignerMaster
+    from d4dj_utils.master.chart_master import ChartMaster
+    from d4dj_utils.master.chart_note_count_master import ChartNoteCountMaster
+    from d4dj_utils.master.comic_master import ComicMaster
+    from d4dj_utils.master.command_master import CommandMaster
+    from d4dj_utils.master.condition_master import ConditionMaster
+    from d4dj_utils.master.event_master import EventMaster
+    from d4dj_utils.master.event_medley_setlist_master import EventMedleySetlistMaster
+    from d4dj_utils.master.event_specific_bonus_master import EventSpecificBonusMaster
+    from d4dj_utils.master.exchange_item_master import ExchangeItemMaster
+    from d4dj_utils.master.exchange_master import ExchangeMaster
+    from d4dj_utils.master.gacha_bonus_master import GachaBonusMaster
+    from d4dj_utils.master.gacha_draw_master import GachaDrawMaster
+    from d4dj_utils.master.gacha_master import GachaMaster
+    from d4dj_utils.master.gacha_roulette_master import GachaRouletteMaster
+    from d4dj_utils.master.gacha_table_master import GachaTableMaster
+    from d4dj_utils.master.gacha_table_rate_master import GachaTableRateMaster
+    from d4dj_utils.master.gacha_summary_word_master import GachaSummaryWordMaster
+    from d4dj_utils.master.hidden_music_mix_detail_master import (
+        HiddenMusicMixDetailMaster,
+    )
+    from d4dj_utils.master.hidden_music_mix_master import HiddenMusicMixMaster
+    from d4dj_utils.master.login_bonus_item_master import LoginBonusItemMaster
+    from d4dj_utils.master.login_bonus_master import LoginBonusMaster
+    from d4dj_utils.master.mission_group_master import MissionGroupMaster
+    from d4dj_utils.master.mission_detail_master import MissionDetailMaster
+    from d4dj_utils.master.mission_panel_master import MissionPanelMaster
+    from d4dj_utils.master.music_master import MusicMaster
+    from d4dj_utils.master.music_mix_master import MusicMixMaster
+    from d4dj_utils.master.parameter_bonus_master import ParameterBonusMaster
+    from d4dj_utils.master.passive_skill_master import PassiveSkillMaster
+    from d4dj_utils.master.rarity_master import RarityMaster
+    from d4dj_utils.master.reward_master import RewardMaster
+    from d4dj_utils.master.skill_master import SkillMaster
+    from d4dj_utils.master.stamp_master import StampMaster
+    from d4dj_utils.master.stock_master import StockMaster
+    from d4dj_utils.master.stock_view_category_master import StockViewCategoryMaster
+    from d4dj_utils.master.unit_master import UnitMaster
 
-class AssetManager:
-    def __init__(self, path, *, timezone=None, drop_extra_fields: bool = False):
-        self.timezone = timezone or pytz.timezone("Asia/Tokyo")
-        self.drop_extra_fields = drop_extra_fields
-        self.logger = logging.getLogger(__name__)
-        self.path = Path(path)
-        self.masters: Dict[str, ma.MasterDict] = {}
-        self.db = sqlite3.connect(
-            ":memory:"
-        )  # So sql queries can be executed on some properties
-        from d4dj_utils.master.achievement_master import AchievementMaster
 
-        self.achievement_master: ma.MasterDict[
-            int, AchievementMaster
-        ] = self._load_master(AchievementMaster)
-        from d4dj_utils.master.attribute_master import AttributeMaster
+@dataclasses.dataclass
+class MasterLoadTiming:
+    read: float = 0.0
+    decode: float = 0.0
+    build: float = 0.0
 
-        self.attribute_master: ma.MasterDict[int, AttributeMaster] = self._load_master(
-            AttributeMaster
-        )
-        from d4dj_utils.master.card_exp_master import CardExpMaster
+    @property
+    def total(self):
+        return self.read + self.decode + self.build
 
-        self.card_exp_master: ma.MasterDict[int, CardExpMaster] = self._load_master(
-            CardExpMaster
+    def __str__(self):
+        return (
+            f"total: {self.total:.3f}s, read: {self.read:.3f}s, "
+            f"decode: {self.decode:.3f}s, build: {self.build:.3f}s"
         )
-        from d4dj_utils.master.card_master import CardMaster
 
-        self.card_master: ma.MasterDict[int, CardMaster] = self._load_master(CardMaster)
-        from d4dj_utils.master.character_master import CharacterMaster
 
-        self.character_master: ma.MasterDict[int, CharacterMaster] = self._load_master(
-            CharacterMaster
-        )
-        from d4dj_utils.master.chart_designer_master import ChartDesignerMaster
+@dataclasses.dataclass
+class RawMaster:
+    data: Optional[Dict[Any, tuple]]
+    signature: Signature
+    timing: MasterLoadTiming
 
-        self.chart_designer_master: ma.MasterDict[
-            int, ChartDesignerMaster
-        ] = self._load_master(ChartDesignerMaster)
-        from d4dj_utils.master.chart_master import ChartMaster
 
-        self.chart_master: ma.MasterDict[int, ChartMaster] = self._load_master(
-            ChartMaster
-        )
-        from d4dj_utils.master.chart_note_count_master import ChartNoteCountMaster
+@dataclasses.dataclass
+class MasterChanges:
+    added: List[Any]
+    removed: List[Any]
+    modified: List[Any]
 
-        self.chart_note_count_master: ma.MasterDict[
-            Tuple[int, int], ChartNoteCountMaster
-        ] = self._load_master(ChartNoteCountMaster)
-        from d4dj_utils.master.comic_master import ComicMaster
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified)
 
-        self.comic_master: ma.MasterDict[int, ComicMaster] = self._load_master(
-            ComicMaster
+    def __str__(self):
+        return (
+            f"added: {len(self.added)}, removed: {len(self.removed)}, "
+            f"modified: {len(self.modified)}"
         )
-        from d4dj_utils.master.command_master import CommandMaster
 
-        self.command_master: ma.MasterDict[int, CommandMaster] = self._load_master(
-            CommandMaster
-        )
-        from d4dj_utils.master.condition_master import ConditionMaster
 
-        self.condition_master: ma.MasterDict[int, ConditionMaster] = self._load_master(
-            ConditionMaster
-        )
-        from d4dj_utils.master.event_master import EventMaster
+@dataclasses.dataclass
+class MasterMemoryUsage:
+    rows: int
+    row_bytes: int
+    # Estimated by _dict_rows_size
+    dict_row_bytes: int
 
-        self.event_master: ma.MasterDict[int, EventMaster] = self._load_master(
-            EventMaster
-        )
-        from d4dj_utils.master.event_medley_setlist_master import (
-            EventMedleySetlistMaster,
+    def __str__(self):
+        rows = max(self.rows, 1)
+        return (
+            f"rows: {self.rows}, bytes per row: {self.row_bytes / rows:.0f}, "
+            f"estimated with instance dicts: {self.dict_row_bytes / rows:.0f}"
         )
 
-        self.event_medley_setlist_master: ma.MasterDict[
-            int, EventMedleySetlistMaster
-        ] = self._load_master(EventMedleySetlistMaster)
-        from d4dj_utils.master.event_specific_bonus_master import (
-            EventSpecificBonusMaster,
+
+@dataclasses.dataclass
+class ChartRenderResult:
+    name: str
+    rendered: bool
+    time: float
+    digest: Optional[str] = None
+    error: Optional[str] = None
+
+    def __str__(self):
+        status = (
+            f"failed ({self.error})"
+            if self.error
+            else ("rendered" if self.rendered else "skipped")
         )
+        return f"{self.name}: {status} in {self.time:.3f}s"
 
-        self.event_specific_bonus_master: ma.MasterDict[
-            int, EventSpecificBonusMaster
-        ] = self._load_master(EventSpecificBonusMaster)
-        from d4dj_utils.master.exchange_item_master import ExchangeItemMaster
 
-        self.exchange_item_master: ma.MasterDict[
-            int, ExchangeItemMaster
-        ] = self._load_master(ExchangeItemMaster)
-        from d4dj_utils.master.exchange_master import ExchangeMaster
+def _dict_rows_size(rows: List[ma.MasterAsset]) -> int:
+    """
+    Estimates the size the given rows would have with an instance __dict__, as before master assets used slots,
+    by measuring plain objects built with the same attributes. The rows themselves are not measured.
+    """
+    dict_row_class = type("DictRow", (), {})
+    dict_rows = [None] * len(rows)
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        start_size = tracemalloc.get_traced_memory()[0]
+        for i, row in enumerate(rows):
+            dict_row = dict_row_class()
+            for field in dataclasses.fields(row):
+                setattr(dict_row, field.name, None)
+            dict_row.assets = None
+            for key in row._cache or ():
+                setattr(dict_row, str(key), None)
+            dict_rows[i] = dict_row
+        return tracemalloc.get_traced_memory()[0] - start_size
+    finally:
+        if not tracing:
+            tracemalloc.stop()
 
-        self.exchange_master: ma.MasterDict[int, ExchangeMaster] = self._load_master(
-            ExchangeMaster
-        )
-        from d4dj_utils.master.gacha_bonus_master import GachaBonusMaster
 
-        self.gacha_bonus_master: ma.MasterDict[
-            Tuple[int, bool], GachaBonusMaster
-        ] = self._load_master(GachaBonusMaster)
-        from d4dj_utils.master.gacha_draw_master import GachaDrawMaster
+class _MasterAttribute:
+    """
+    Loads a master the first time it is accessed.
+    The result is stored in the instance dict, which shadows this descriptor afterwards.
+    Masters decoded this way are only added to the snapshot on the next save_snapshot or close.
+    """
 
-        self.gacha_draw_master: ma.MasterDict[int, GachaDrawMaster] = self._load_master(
-            GachaDrawMaster
-        )
-        from d4dj_utils.master.gacha_master import GachaMaster
+    def __init__(self, class_name: str):
+        self.class_name = class_name
+        self.attribute_name = None
 
-        self.gacha_master: ma.MasterDict[int, GachaMaster] = self._load_master(
-            GachaMaster
-        )
-        from d4dj_utils.master.gacha_roulette_master import GachaRouletteMaster
-
-        self.gacha_roulette_master: ma.MasterDict[
-            int, GachaRouletteMaster
-        ] = self._load_master(GachaRouletteMaster)
-        from d4dj_utils.master.gacha_table_master import GachaTableMaster
-
-        self.gacha_table_master: ma.MasterDict[
-            int, GachaTableMaster
-        ] = self._load_master(GachaTableMaster)
-        from d4dj_utils.master.gacha_table_rate_master import GachaTableRateMaster
-
-        self.gacha_table_rate_master: ma.MasterDict[
-            int, GachaTableRateMaster
-        ] = self._load_master(GachaTableRateMaster)
-        from d4dj_utils.master.gacha_summary_word_master import GachaSummaryWordMaster
-
-        self.gacha_summary_word_master: ma.MasterDict[
-            int, GachaSummaryWordMaster
-        ] = self._load_master(GachaSummaryWordMaster)
-        from d4dj_utils.master.hidden_music_mix_detail_master import HiddenMusicMixDetailMaster
-
-        self.hidden_music_mix_detail_master: ma.MasterDict[
-            int, HiddenMusicMixDetailMaster
-        ] = self._load_master(HiddenMusicMixDetailMaster)
-        from d4dj_utils.master.hidden_music_mix_master import HiddenMusicMixMaster
-
-        self.hidden_music_mix_master: ma.MasterDict[
-            Tuple[int, int], HiddenMusicMixMaster
-        ] = self._load_master(HiddenMusicMixMaster)
-        from d4dj_utils.master.login_bonus_item_master import LoginBonusItemMaster
-
-        self.login_bonus_item_master: ma.MasterDict[
-            Tuple[int, int], LoginBonusItemMaster
-        ] = self._load_master(LoginBonusItemMaster)
-        from d4dj_utils.master.login_bonus_master import LoginBonusMaster
-
-        self.login_bonus_master: ma.MasterDict[
-            int, LoginBonusMaster
-        ] = self._load_master(LoginBonusMaster)
-        from d4dj_utils.master.mission_group_master import MissionGroupMaster
-
-        self.mission_group_master: ma.MasterDict[
-            int, MissionGroupMaster
-        ] = self._load_master(MissionGroupMaster)
-        from d4dj_utils.master.mission_detail_master import MissionDetailMaster
-
-        self.mission_detail_master: ma.MasterDict[
-            int, MissionDetailMaster
-        ] = self._load_master(MissionDetailMaster)
-        from d4dj_utils.master.mission_panel_master import MissionPanelMaster
-
-        self.mission_panel_master: ma.MasterDict[
-            int, MissionPanelMaster
-        ] = self._load_master(MissionPanelMaster)
-        from d4dj_utils.master.music_master import MusicMaster
-
-        self.music_master: ma.MasterDict[int, MusicMaster] = self._load_master(
-            MusicMaster
-        )
-        from d4dj_utils.master.music_mix_master import MusicMixMaster
+    def __set_name__(self, owner, name):
+        self.attribute_name = name
 
-        self.music_mix_master: ma.MasterDict[
-            Tuple[int, int], MusicMixMaster
-        ] = self._load_master(MusicMixMaster)
-        from d4dj_utils.master.parameter_bonus_master import ParameterBonusMaster
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return self.load(instance)
 
-        self.parameter_bonus_master: ma.MasterDict[
-            int, ParameterBonusMaster
-        ] = self._load_master(ParameterBonusMaster)
-        from d4dj_utils.master.passive_skill_master import PassiveSkillMaster
+    @property
+    def master_class(self) -> Type[ma.MasterAsset]:
+        module = importlib.import_module(f"d4dj_utils.master.{self.attribute_name}")
+        return getattr(module, self.class_name)
 
-        self.passive_skill_master: ma.MasterDict[
-            int, PassiveSkillMaster
-        ] = self._load_master(PassiveSkillMaster)
-        from d4dj_utils.master.rarity_master import RarityMaster
+    def load(
+        self, instance: AssetManager, raw_master: Optional[RawMaster] = None
+    ) -> ma.MasterDict:
+        master = instance._load_master(self.master_class, raw_master)
+        instance.__dict__[self.attribute_name] = master
+        return master
 
-        self.rarity_master: ma.MasterDict[int, RarityMaster] = self._load_master(
-            RarityMaster
-        )
-        from d4dj_utils.master.reward_master import RewardMaster
 
-        self.reward_master: ma.MasterDict[int, RewardMaster] = self._load_master(
-            RewardMaster
-        )
-        from d4dj_utils.master.skill_master import SkillMaster
+class AssetManager:
+    achievement_master: ma.MasterDict[int, AchievementMaster] = _MasterAttribute(
+        "AchievementMaster"
+    )
+    attribute_master: ma.MasterDict[int, AttributeMaster] = _MasterAttribute(
+        "AttributeMaster"
+    )
+    card_exp_master: ma.MasterDict[int, CardExpMaster] = _MasterAttribute(
+        "CardExpMaster"
+    )
+    card_master: ma.MasterDict[int, CardMaster] = _MasterAttribute("CardMaster")
+    character_master: ma.MasterDict[int, CharacterMaster] = _MasterAttribute(
+        "CharacterMaster"
+    )
+    chart_designer_master: ma.MasterDict[int, ChartDesignerMaster] = _MasterAttribute(
+        "ChartDesignerMaster"
+    )
+    chart_master: ma.MasterDict[int, ChartMaster] = _MasterAttribute("ChartMaster")
+    chart_note_count_master: ma.MasterDict[Tuple[int, int], ChartNoteCountMaster] = (
+        _MasterAttribute("ChartNoteCountMaster")
+    )
+    comic_master: ma.MasterDict[int, ComicMaster] = _MasterAttribute("ComicMaster")
+    command_master: ma.MasterDict[int, CommandMaster] = _MasterAttribute(
+        "CommandMaster"
+    )
+    condition_master: ma.MasterDict[int, ConditionMaster] = _MasterAttribute(
+        "ConditionMaster"
+    )
+    event_master: ma.MasterDict[int, EventMaster] = _MasterAttribute("EventMaster")
+    event_medley_setlist_master: ma.MasterDict[int, EventMedleySetlistMaster] = (
+        _MasterAttribute("EventMedleySetlistMaster")
+    )
+    event_specific_bonus_master: ma.MasterDict[int, EventSpecificBonusMaster] = (
+        _MasterAttribute("EventSpecificBonusMaster")
+    )
+    exchange_item_master: ma.MasterDict[int, ExchangeItemMaster] = _MasterAttribute(
+        "ExchangeItemMaster"
+    )
+    exchange_master: ma.MasterDict[int, ExchangeMaster] = _MasterAttribute(
+        "ExchangeMaster"
+    )
+    gacha_bonus_master: ma.MasterDict[Tuple[int, bool], GachaBonusMaster] = (
+        _MasterAttribute("GachaBonusMaster")
+    )
+    gacha_draw_master: ma.MasterDict[int, GachaDrawMaster] = _MasterAttribute(
+        "GachaDrawMaster"
+    )
+    gacha_master: ma.MasterDict[int, GachaMaster] = _MasterAttribute("GachaMaster")
+    gacha_roulette_master: ma.MasterDict[int, GachaRouletteMaster] = _MasterAttribute(
+        "GachaRouletteMaster"
+    )
+    gacha_table_master: ma.MasterDict[int, GachaTableMaster] = _MasterAttribute(
+        "GachaTableMaster"
+    )
+    gacha_table_rate_master: ma.MasterDict[int, GachaTableRateMaster] = (
+        _MasterAttribute("GachaTableRateMaster")
+    )
+    gacha_summary_word_master: ma.MasterDict[int, GachaSummaryWordMaster] = (
+        _MasterAttribute("GachaSummaryWordMaster")
+    )
+    hidden_music_mix_detail_master: ma.MasterDict[int, HiddenMusicMixDetailMaster] = (
+        _MasterAttribute("HiddenMusicMixDetailMaster")
+    )
+    hidden_music_mix_master: ma.MasterDict[Tuple[int, int], HiddenMusicMixMaster] = (
+        _MasterAttribute("HiddenMusicMixMaster")
+    )
+    login_bonus_item_master: ma.MasterDict[Tuple[int, int], LoginBonusItemMaster] = (
+        _MasterAttribute("LoginBonusItemMaster")
+    )
+    login_bonus_master: ma.MasterDict[int, LoginBonusMaster] = _MasterAttribute(
+        "LoginBonusMaster"
+    )
+    mission_group_master: ma.MasterDict[int, MissionGroupMaster] = _MasterAttribute(
+        "MissionGroupMaster"
+    )
+    mission_detail_master: ma.MasterDict[int, MissionDetailMaster] = _MasterAttribute(
+        "MissionDetailMaster"
+    )
+    mission_panel_master: ma.MasterDict[int, MissionPanelMaster] = _MasterAttribute(
+        "MissionPanelMaster"
+    )
+    music_master: ma.MasterDict[int, MusicMaster] = _MasterAttribute("MusicMaster")
+    music_mix_master: ma.MasterDict[Tuple[int, int], MusicMixMaster] = _MasterAttribute(
+        "MusicMixMaster"
+    )
+    parameter_bonus_master: ma.MasterDict[int, ParameterBonusMaster] = _MasterAttribute(
+        "ParameterBonusMaster"
+    )
+    passive_skill_master: ma.MasterDict[int, PassiveSkillMaster] = _MasterAttribute(
+        "PassiveSkillMaster"
+    )
+    rarity_master: ma.MasterDict[int, RarityMaster] = _MasterAttribute("RarityMaster")
+    reward_master: ma.MasterDict[int, RewardMaster] = _MasterAttribute("RewardMaster")
+    skill_master: ma.MasterDict[int, SkillMaster] = _MasterAttribute("SkillMaster")
+    stamp_master: ma.MasterDict[int, StampMaster] = _MasterAttribute("StampMaster")
+    stock_master: ma.MasterDict[int, StockMaster] = _MasterAttribute("StockMaster")
+    stock_view_category_master: ma.MasterDict[int, StockViewCategoryMaster] = (
+        _MasterAttribute("StockViewCategoryMaster")
+    )
+    unit_master: ma.MasterDict[int, UnitMaster] = _MasterAttribute("UnitMaster")
 
-        self.skill_master: ma.MasterDict[int, SkillMaster] = self._load_master(
-            SkillMaster
+    def __init__(
+        self,
+        path,
+        *,
+        timezone=None,
+        drop_extra_fields: bool = False,
+        lazy: bool = False,
+        workers: int = 1,
+        snapshot: bool = False,
+        columnar: bool = False,
+        chart_cache_size: int = 64,
+        chart_archive: bool = False,
+        scoring_cache_size: int = 256,
+        scoring_table_store: bool = False,
+        scoring_tables: bool = False,
+    ):
+        self.timezone = timezone or pytz.timezone("Asia/Tokyo")
+        self.drop_extra_fields = drop_extra_fields
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(path)
+        self.workers = workers
+        self.columnar = columnar
+        self.masters: Dict[str, ma.MasterDict] = {}
+        self.load_timings: Dict[str, MasterLoadTiming] = {}
+        self._master_signatures: Dict[str, Signature] = {}
+        self.chart_statistics_cache: Dict[int, Tuple[Signature, ChartStatistics]] = {}
+        self.chart_file_digest_cache: Dict[int, Tuple[Signature, bytes]] = {}
+        self.chart_cache = ChartCache(chart_cache_size)
+        self.chart_archive = (
+            ChartArchive(self.chart_archive_path) if chart_archive else None
         )
-        from d4dj_utils.master.stamp_master import StampMaster
-
-        self.stamp_master: ma.MasterDict[int, StampMaster] = self._load_master(
-            StampMaster
+        self.scoring_cache = ChartCache(scoring_cache_size)
+        self.scoring_table_store = (
+            ScoringTableStore(self.scoring_table_store_path)
+            if scoring_table_store
+            else None
         )
-        from d4dj_utils.master.stock_master import StockMaster
-
-        self.stock_master: ma.MasterDict[int, StockMaster] = self._load_master(
-            StockMaster
+        self.scoring_tables = (
+            ScoringTables(self.scoring_tables_path) if scoring_tables else None
         )
-        from d4dj_utils.master.stock_view_category_master import StockViewCategoryMaster
+        self.snapshot = MasterSnapshot(self.snapshot_path) if snapshot else None
+        self.db = sqlite3.connect(
+            ":memory:"
+        )  # So sql queries can be executed on some properties
+        if not lazy:
+            self.load_all_masters()
+            master_paths = set(sorted(path for path in self.get_master_paths()))
+            loaded_master_paths = {master.path for master in self.masters.values()}
+            for path in sorted(master_paths.difference(loaded_master_paths)):
+                self.logger.debug(f'Unknown master file not loaded "{path}".')
 
-        self.stock_view_category_master: ma.MasterDict[
-            int, StockViewCategoryMaster
-        ] = self._load_master(StockViewCategoryMaster)
-        from d4dj_utils.master.unit_master import UnitMaster
+    @classmethod
+    def _master_attributes(cls) -> Dict[str, _MasterAttribute]:
+        """Maps the class name of each master to the attribute that loads it."""
+        return {
+            value.class_name: value
+            for klass in reversed(cls.__mro__)
+            for value in vars(klass).values()
+            if isinstance(value, _MasterAttribute)
+        }
 
-        self.unit_master: ma.MasterDict[int, UnitMaster] = self._load_master(UnitMaster)
-        master_paths = set(sorted(path for path in self.get_master_paths()))
-        loaded_master_paths = {master.path for master in self.masters.values()}
-        for path in sorted(master_paths.difference(loaded_master_paths)):
-            self.logger.debug(f'Unknown master file not loaded "{path}".')
+    def load_all_masters(self):
+        attributes = [
+            attribute
+            for attribute in self._master_attributes().values()
+            if attribute.attribute_name not in self.__dict__
+        ]
+        if self.workers > 1:
+            # Reading and decompressing happens on the pool,
+            # while building master dicts and database tables stays on this thread.
+            with ThreadPoolExecutor(self.workers) as executor:
+                raw_masters = executor.map(
+                    self._read_master,
+                    [attribute.class_name for attribute in attributes],
+                )
+                for attribute, raw_master in zip(attributes, raw_masters):
+                    attribute.load(self, raw_master)
+        else:
+            for attribute in attributes:
+                attribute.load(self)
+        self.save_snapshot()
 
     def __getitem__(self, item):
+        if item not in self.masters and item in self._master_attributes():
+            getattr(self, self._master_attributes()[item].attribute_name)
         return self.masters.__getitem__(item)
 
+    @functools.cached_property
+    def event_index(self) -> ei.EventIndex:
+        """Index of event time windows, for looking up events by time."""
+        return ei.EventIndex(self.event_master.values())
+
+    def get_gacha_tables(
+        self, table_ids: Sequence[int]
+    ) -> List[List["GachaTableMaster"]]:
+        """The rows of each of the given gacha tables, looked up in the table_id index of the gacha table master."""
+        gacha_table_master = self.gacha_table_master
+        return [
+            list(gacha_table_master.by("table_id", table_id)) for table_id in table_ids
+        ]
+
+    def get_card_availabilities(self) -> Dict[int, "CardAvailability"]:
+        """
+        The availability of every card, as in CardMaster.availability,
+        finding the pick up gacha of every card in one pass over the gacha master.
+        """
+        gachas: Dict[int, "GachaMaster"] = {}
+        for gacha in self.gacha_master.values():
+            if "★4" in gacha.name:
+                continue
+            for card_id in gacha.pick_up_card_ids:
+                gachas.setdefault(card_id, gacha)
+        return {
+            card_id: card.get_availability(gachas.get(card_id))
+            for card_id, card in self.card_master.items()
+        }
+
     def save_masters(self, encrypt=True):
         for value in self.masters.values():
             value.save(encrypt)
@@ -244,10 +449,282 @@ class AssetManager:
     def get_master_paths(self):
         return (self.path / "Master").glob("*Master.msgpack")
 
+    # Files generated from the assets are kept next to the asset directory rather than in it
+
+    @property
+    def snapshot_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.snapshot")
+
+    @property
+    def chart_archive_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.charts")
+
+    @property
+    def render_manifest_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.render")
+
+    @property
+    def scoring_table_store_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.scoring_store")
+
+    @property
+    def scoring_tables_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.scoring")
+
+    def get_chart_statistics_table(self) -> Dict[int, ChartStatistics]:
+        """Returns the note statistics of every chart in the master that has a chart file."""
+        return {
+            chart_id: statistics
+            for chart_id, chart in self.chart_master.items()
+            if (statistics := chart.statistics) is not None
+        }
+
+    def compare_chart_note_counts(
+        self, sections: bool = False
+    ) -> Dict[Tuple[int, int], Tuple[Optional[int], int]]:
+        """
+        Compares ChartNoteCountMaster against note counts of the chart files.
+        Returns (master count, chart count) for each (chart id, section id) that differs.
+        Only full charts are compared unless sections is set, since sections require trimming.
+        """
+        from d4dj_utils.master.common_enums import ChartSectionType
+
+        note_count_master = self.chart_note_count_master
+        differences = {}
+        for chart_id, chart in self.chart_master.items():
+            if sections and chart.mix_info:
+                if self.chart_file_signature(chart.chart_path) is None:
+                    continue
+                counts = chart.get_section_note_counts()
+            elif (statistics := chart.statistics) is not None:
+                counts = {ChartSectionType.Full: statistics.note_count}
+            else:
+                continue
+            for section, count in counts.items():
+                key = (chart_id, section.value)
+                note_count = note_count_master.get(key)
+                master_count = note_count.count if note_count else None
+                if master_count != count:
+                    differences[key] = (master_count, count)
+        return differences
+
+    def get_skill_duration_sets(
+        self, slots: int = 5, max_sets: int = 4096
+    ) -> List[Tuple[float, ...]]:
+        """
+        Every ordered combination of the distinct skill durations of cards, one duration per skill slot.
+        These are the skill durations a team of cards can have.
+        With k distinct durations there are k ** slots sets, and precompute_scoring_tables computes a table
+        for each of them per chart, so a ValueError is raised if there would be more than max_sets.
+        Pass the duration sets of the teams actually scored to precompute_scoring_tables instead.
+        """
+        durations = sorted(
+            {float(card.skill.max_seconds) for card in self.card_master.values()}
+        )
+        if len(durations) ** slots > max_sets:
+            raise ValueError(
+                f"{len(durations)} distinct skill durations make {len(durations) ** slots} duration sets, "
+                f"more than the maximum of {max_sets}."
+            )
+        return list(itertools.product(durations, repeat=slots))
+
+    def precompute_scoring_tables(
+        self,
+        duration_sets: Optional[List[Tuple[float, ...]]] = None,
+        workers: int = 1,
+    ) -> int:
+        """
+        Computes the scoring table of every chart in the master for every set of skill durations,
+        such as those of the teams to be scored, and writes them to the scoring tables file,
+        replacing any existing file. By default every set from get_skill_duration_sets is computed,
+        which grows exponentially with the number of distinct skill durations.
+        The new file is then used by ChartMaster.load_scoring_data.
+        With more than one worker, charts are simulated on a process pool.
+        Returns the number of tables written.
+        """
+        if duration_sets is None:
+            duration_sets = self.get_skill_duration_sets()
+        duration_sets = [
+            tuple(float(duration) for duration in durations)
+            for durations in duration_sets
+        ]
+        start_time = time.perf_counter()
+        arguments = [
+            (chart_id, duration_sets)
+            for chart_id, chart_mas in self.chart_master.items()
+            if self.chart_file_signature(chart_mas.chart_path) is not None
+        ]
+        # Tables are written as each chart is computed, rather than collected in memory first
+        results = self._iter_on_pool("_compute_scoring_tables", arguments, workers)
+        if self.scoring_tables:
+            self.scoring_tables.close()
+        count = write_scoring_tables(
+            self.scoring_tables_path,
+            (entry for entries in results for entry in entries),
+        )
+        self.scoring_tables = ScoringTables(self.scoring_tables_path)
+        self.logger.info(
+            f"Precomputed {count} scoring tables for {len(arguments)} charts "
+            f"in {time.perf_counter() - start_time:.3f}s."
+        )
+        return count
+
+    def _compute_scoring_tables(
+        self, chart_id: int, duration_sets: List[Tuple[float, ...]]
+    ) -> List[Tuple[str, Tuple[int, Tuple[float, ...]], bytes]]:
+        from d4dj_utils.chart.score_calculator import get_chart_scoring_table
+
+        chart_mas = self.chart_master[chart_id]
+        try:
+            chart = chart_mas.load_chart_data()
+            if not chart.info:
+                return []
+            # The chart files are hashed once, and each key is derived from their digest
+            file_digest = chart_mas.get_file_digest()
+            return [
+                (
+                    chart_mas.get_scoring_key(durations, file_digest),
+                    (chart_id, durations),
+                    get_chart_scoring_table(chart, durations).to_msgpack(),
+                )
+                for durations in duration_sets
+            ]
+        except Exception as e:
+            self.logger.warning(
+                f"Failed to compute scoring tables of chart {chart_id}: {e!r}"
+            )
+            return []
+
+    def pack_charts(self) -> int:
+        """
+        Packs all chart and common data files into the chart archive, replacing any existing archive.
+        Returns the number of files packed.
+        """
+        if self.chart_archive:
+            self.chart_archive.close()
+        count = write_chart_archive(
+            self.path / "ondemand" / "chart", self.chart_archive_path
+        )
+        self.chart_archive = ChartArchive(self.chart_archive_path)
+        self.chart_cache.clear()
+        self.logger.info(f'Packed {count} chart files to "{self.chart_archive_path}".')
+        return count
+
+    def read_chart_file(self, path: Path):
+        """Reads a chart or common data file from the chart archive if it is archived and up to date, or from disk otherwise."""
+        if self.chart_archive and self.chart_archive.current_signature(path):
+            return self.chart_archive.get(chart_file_id(path))
+        return path.read_bytes()
+
+    def chart_file_signature(self, path: Path) -> Optional[Tuple[str, int, int]]:
+        """
+        Identifies the version of a chart or common data file, or returns None if it does not exist.
+        Other files, such as audio metadata, are identified by their signature on disk.
+        """
+        if self.chart_archive:
+            signature = self.chart_archive.current_signature(path)
+            if signature is not None:
+                return signature
+        try:
+            return file_signature([path])[0]
+        except FileNotFoundError:
+            return None
+
+    def save_snapshot(self):
+        """
+        Writes masters decoded since the last save to the snapshot, if enabled.
+        Called after load_all_masters and reload. With lazy loading, call it (or close) once
+        the needed masters have been accessed, so the file is rewritten once rather than per master.
+        """
+        if self.snapshot:
+            self.snapshot.save()
+
+    def close(self):
+        """Saves the snapshot and closes memory-mapped files. Loaded masters remain usable."""
+        self.save_snapshot()
+        if self.chart_archive:
+            self.chart_archive.close()
+            self.chart_archive = None
+        if self.scoring_tables:
+            self.scoring_tables.close()
+            self.scoring_tables = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _master_source_paths(self, name: str) -> Optional[List[Path]]:
+        asset_path = self.path / f"Master/{name}.msgpack"
+        if not asset_path.exists():
+            return None
+        # Values in the main file take precedence over archived values
+        return [*self.path.glob(f"Master/{name}.*.msgpack"), asset_path]
+
+    def _read_master(self, name: str) -> RawMaster:
+        """
+        Reads and decodes the rows of a master, merging in any archive files.
+        This does not modify the asset manager, so it may run on worker threads.
+        """
+        timing = MasterLoadTiming()
+        paths = self._master_source_paths(name)
+        if paths is None:
+            return RawMaster(None, (), timing)
+        signature = file_signature(paths)
+        if self.snapshot:
+            start_time = time.perf_counter()
+            data = self.snapshot.get(name, signature)
+            if data is not None:
+                timing.decode = time.perf_counter() - start_time
+                return RawMaster(data, signature, timing)
+        data = {}
+        for path in paths:
+            start_time = time.perf_counter()
+            raw = path.read_bytes()
+            read_time = time.perf_counter()
+            data.update(self._decode_master(raw))
+            timing.read += read_time - start_time
+            timing.decode += time.perf_counter() - read_time
+        if self.snapshot:
+            self.snapshot.put(name, signature, data)
+        return RawMaster(data, signature, timing)
+
+    @staticmethod
+    def _decode_master(raw: bytes) -> Dict[Any, tuple]:
+        data = msgpack.unpackb(raw, strict_map_key=False, use_list=False)
+        if isinstance(data, msgpack.ExtType) and data.code == 99:
+            data = data.data
+            msgpack_code = data[0]
+            size = int.from_bytes(data[1:5], byteorder="big", signed=True)
+            data = data[5:]
+            data = lz4.block.decompress(data, size)
+            data = msgpack.unpackb(data, strict_map_key=False, use_list=False)
+        return data
+
     def _load_master(
-        self, cls: Type[ma.MasterAsset], archive_load_path: Optional[Path] = None
+        self, cls: Type[ma.MasterAsset], raw_master: Optional[RawMaster] = None
     ) -> ma.MasterDict:
         name = cls.__name__
+        asset_path = self.path / f"Master/{name}.msgpack"
+        raw_master = raw_master or self._read_master(name)
+        if raw_master.data is None:
+            return ma.MasterDict(cls.default(self), name, asset_path)
+        start_time = time.perf_counter()
+        master_dict = self._new_master_dict(
+            cls, self._build_master_values(cls, raw_master.data), name, asset_path
+        )
+        self.masters[name] = master_dict
+        self._master_signatures[name] = raw_master.signature
+        self._create_master_table(cls, master_dict)
+        raw_master.timing.build = time.perf_counter() - start_time
+        self.load_timings[name] = raw_master.timing
+        self.logger.debug(f"Loaded master {name} ({raw_master.timing}).")
+        return master_dict
+
+    def _build_master_values(
+        self, cls: Type[ma.MasterAsset], data: Dict[Any, tuple]
+    ) -> Dict[Any, ma.MasterAsset]:
         # -1 for self, and -1 for the asset_manager argument.
         # What remains is the number of arguments to keep from the msgpack file itself.
         init_fn = getattr(cls, "new", cls)
@@ -257,44 +734,31 @@ class AssetManager:
             param.kind == param.kind.VAR_POSITIONAL for param in sig.parameters.values()
         ):
             argument_count = 999
-        archive_values = {}
-        if archive_load_path is None:
-            asset_path = self.path / f"Master/{name}.msgpack"
-            for archive_path in self.path.glob(f"Master/{name}.*.msgpack"):
-                archive_values.update(self._load_master(cls, archive_path))
-        else:
-            asset_path = archive_load_path
-        if not asset_path.exists():
-            return ma.MasterDict(cls.default(self), name, asset_path)
-        with asset_path.open("rb") as f:
-            data = msgpack.load(f, strict_map_key=False, use_list=False)
-        try:
-            if data.code == 99:
-                data = data.data
-                msgpack_code = data[0]
-                size = int.from_bytes(data[1:5], byteorder="big", signed=True)
-                data = data[5:]
-                data = lz4.block.decompress(data, size)
-                data = msgpack.loads(data, strict_map_key=False, use_list=False)
-        except AttributeError:
-            pass
         if self.drop_extra_fields and data:
             if len(next(iter(data.values()))) > argument_count:
-                self.logger.info(f"Dropping extra arguments from {name}.")
-            master_dict = ma.MasterDict(
-                {k: init_fn(self, *(v[:argument_count])) for k, v in data.items()},
-                name,
-                asset_path,
-            )
+                self.logger.info(f"Dropping extra arguments from {cls.__name__}.")
+            return {k: init_fn(self, *(v[:argument_count])) for k, v in data.items()}
         else:
-            master_dict = ma.MasterDict(
-                {k: init_fn(self, *v) for k, v in data.items()}, name, asset_path
-            )
-        if archive_load_path:
-            return master_dict
-        archive_values.update(master_dict)
-        master_dict = ma.MasterDict({**archive_values, **master_dict}, name, asset_path)
-        self.masters[name] = master_dict
+            return {k: init_fn(self, *v) for k, v in data.items()}
+
+    def _new_master_dict(
+        self,
+        cls: Type[ma.MasterAsset],
+        values: Dict[Any, ma.MasterAsset],
+        name: str,
+        path: Path,
+    ) -> ma.MasterDict:
+        if self.columnar and getattr(cls, "columnar", False):
+            from d4dj_utils.master.columnar_master import ColumnarMasterDict
+
+            if ColumnarMasterDict.can_store(values):
+                return ColumnarMasterDict(values, name, path)
+        return ma.MasterDict(values, name, path)
+
+    def _create_master_table(
+        self, cls: Type[ma.MasterAsset], master_dict: ma.MasterDict
+    ):
+        name = master_dict.name
         if master_dict:
             db_fields = next(iter(master_dict.values())).db_fields
         else:
@@ -302,6 +766,7 @@ class AssetManager:
         if db_fields:
             with self.db:
                 cur = self.db.cursor()
+                cur.execute(f"DROP TABLE IF EXISTS {name}")
                 fields = [cls.__dataclass_fields__[db_field] for db_field in db_fields]
                 type_mapping = {
                     bool: "integer",
@@ -321,9 +786,105 @@ class AssetManager:
                     field_dict = dataclasses.asdict(value)
                     field_values = [field_dict[name] for name in db_fields]
                     cur.execute(insert_query, field_values)
-        return master_dict
+
+    def reload(self) -> Dict[str, MasterChanges]:
+        """
+        Reloads loaded masters whose files changed since they were loaded.
+        Master dicts are updated in place, keeping the existing objects for unchanged rows.
+        Returns the changed keys of each master that changed.
+        """
+        master_paths = {path.name for path in self.get_master_paths()}
+        changes = {}
+        for name, master_dict in list(self.masters.items()):
+            if master_dict.path.name not in master_paths:
+                self.logger.warning(f"Master file for {name} no longer exists.")
+                continue
+            signature = file_signature(self._master_source_paths(name))
+            if signature == self._master_signatures.get(name):
+                continue
+            cls = self._master_attributes()[name].master_class
+            raw_master = self._read_master(name)
+            start_time = time.perf_counter()
+            new_values = self._build_master_values(cls, raw_master.data)
+            master_changes = MasterChanges(
+                added=[k for k in new_values if k not in master_dict],
+                removed=[k for k in master_dict if k not in new_values],
+                modified=[
+                    k
+                    for k, v in new_values.items()
+                    if k in master_dict and master_dict[k] != v
+                ],
+            )
+            self._master_signatures[name] = raw_master.signature
+            if not master_changes:
+                continue
+            modified = set(master_changes.modified)
+            new_values = {
+                k: master_dict[k] if k in master_dict and k not in modified else v
+                for k, v in new_values.items()
+            }
+            master_dict.replace(new_values)
+            self._create_master_table(cls, master_dict)
+            raw_master.timing.build = time.perf_counter() - start_time
+            self.load_timings[name] = raw_master.timing
+            self.logger.info(f"Reloaded master {name} ({master_changes}).")
+            changes[name] = master_changes
+        if changes:
+            self._clear_cached_properties()
+            # Chart info depends on master values, such as music durations
+            self.chart_cache.clear()
+            if "EventMaster" in changes:
+                self.__dict__.pop("event_index", None)
+        self.save_snapshot()
+        return changes
+
+    def _clear_cached_properties(self):
+        """Clears cached properties on loaded rows, since they may refer to stale values."""
+        for master_dict in self.masters.values():
+            for value in master_dict.values():
+                value.clear_cache()
+
+    def formatted_load_timings(self):
+        return "\n".join(
+            f"{name}: {timing}"
+            for name, timing in sorted(
+                self.load_timings.items(), key=lambda item: -item[1].total
+            )
+        )
+
+    def memory_usage(self) -> Dict[str, MasterMemoryUsage]:
+        """
+        Measures the memory used by the row objects of each loaded master, excluding field values.
+        The size with instance dicts is an estimate, measured on plain objects built with the same attributes
+        rather than on rows loaded that way, to compare against rows without slots.
+        """
+        from d4dj_utils.master.columnar_master import ColumnarMasterDict
+
+        usage = {}
+        for name, master_dict in self.masters.items():
+            rows = list(master_dict.values())
+            if isinstance(master_dict, ColumnarMasterDict):
+                row_bytes = master_dict.nbytes
+            else:
+                row_bytes = sum(
+                    sys.getsizeof(row)
+                    + (sys.getsizeof(row._cache) if row._cache else 0)
+                    for row in rows
+                )
+            dict_row_bytes = _dict_rows_size(rows)
+            usage[name] = MasterMemoryUsage(len(rows), row_bytes, dict_row_bytes)
+        return usage
+
+    def formatted_memory_usage(self):
+        return "\n".join(
+            f"{name}: {usage}"
+            for name, usage in sorted(
+                self.memory_usage().items(), key=lambda item: -item[1].dict_row_bytes
+            )
+        )
 
     def formatted_masters(self):
+        self.load_all_masters()
         return "\n\n".join(
             (
                 f"{k}:\n" + textwrap.indent(v.formatted(), "    ")
@@ -332,49 +893,184 @@ class AssetManager:
         )
 
     def dump_formatted_masters(self):
+        self.load_all_masters()
         for master in self.masters.values():
             with master.path.with_suffix(".txt").open("w", encoding="utf-8") as f:
                 f.write(master.formatted())
                 self.logger.info(f"Dumped master {master.name}")
 
-    def render_charts_by_master(self, force_update: bool = False):
+    def render_charts_by_master(
+        self, force_update: bool = False, workers: int = 1
+    ) -> List[ChartRenderResult]:
         """
         Renders charts based on values within charts master.
         This includes mix data but may miss some chart files that have been released without being added to masters.
+        Charts are only rendered again if their chart data, common data, mix info or the renderer changed,
+        as recorded in the render manifest.
+        With more than one worker, charts are rendered on a process pool, where each process loads its own asset manager.
+        """
+        return self._render_charts(
+            "_render_chart_by_master",
+            {
+                chart_mas.image_path.name: (chart_id, force_update)
+                for chart_id, chart_mas in self.chart_master.items()
+            },
+            workers,
+        )
+
+    def _render_chart_by_master(
+        self, chart_id: int, force_update: bool, previous_digest: Optional[str]
+    ) -> ChartRenderResult:
+        start_time = time.perf_counter()
+        chart_mas = self.chart_master[chart_id]
+        try:
+            digest = chart_mas.get_render_digest()
+            image_path = chart_mas.image_path
+            mix_path = chart_mas.mix_path
+            if (
+                not force_update
+                and digest == previous_digest
+                and image_path.exists()
+                and (mix_path.exists() or not chart_mas.mix_info)
+            ):
+                self.logger.debug(f'Chart already processed at "{image_path}".')
+                return ChartRenderResult(
+                    str(chart_id), False, time.perf_counter() - start_time, digest
+                )
+            chart = chart_mas.load_chart_data()
+            chart.render().save(image_path)
+            self.logger.info(f'Chart rendered at "{image_path}".')
+            mix_sections = chart_mas.load_sections(chart)
+            if mix_sections:
+                chart_mas.render_sections(mix_sections).save(mix_path)
+                self.logger.info(f'Mix rendered at "{mix_path}".')
+            return ChartRenderResult(
+                str(chart_id), True, time.perf_counter() - start_time, digest
+            )
+        except Exception as e:
+            self.logger.warning(f"Failed to render chart {chart_id}: {e!r}")
+            return ChartRenderResult(
+                str(chart_id), False, time.perf_counter() - start_time, error=repr(e)
+            )
+
+    def render_charts_by_file(
+        self, force_update: bool = False, workers: int = 1
+    ) -> List[ChartRenderResult]:
+        """
+        Renders chart files without chart info, skipping those whose data has not changed since they were rendered.
+        With more than one worker, charts are rendered on a process pool.
         """
-        for chart_mas in self.chart_master.values():
-            try:
-                chart = chart_mas.load_chart_data()
-                image_path = chart_mas.image_path
-                mix_path = chart_mas.mix_path
-                mix_sections = chart_mas.load_sections()
-                if not force_update and (
-                    image_path.exists() and (mix_path.exists() or not mix_sections)
-                ):
-                    self.logger.debug(f'Chart already processed at "{image_path}".')
-                    continue
-                chart.render().save(image_path)
-                self.logger.info(f'Chart rendered at "{image_path}".')
-                if mix_sections:
-                    chart_mas.render_sections(mix_sections).save(mix_path)
-                    self.logger.info(f'Mix rendered at "{mix_path}".')
-            except:
-                self.logger.warning(f"Failed to render chart {chart_mas.id}.")
-
-    def render_charts_by_file(self):
         charts_path = self.path / "ondemand" / "chart"
-        for common_data_path in charts_path.glob("chart_*0"):
-            for path in charts_path.glob(f"{common_data_path.name[:-1]}[1-4]"):
-                out_path = path.with_suffix(".png")
-                if out_path.exists():
-                    self.logger.debug(f'Chart already processed at "{path}".')
-                    continue
-                with path.open("rb") as f:
-                    chart = Chart.from_msgpack(f.read(), None)
-                chart.render().save(out_path)
-                self.logger.info(f'Chart rendered at "{path}".')
+        return self._render_charts(
+            "_render_chart_file",
+            {
+                path.with_suffix(".png").name: (path.name, force_update)
+                for common_data_path in charts_path.glob("chart_*0")
+                for path in charts_path.glob(f"{common_data_path.name[:-1]}[1-4]")
+            },
+            workers,
+        )
+
+    def _render_chart_file(
+        self, name: str, force_update: bool, previous_digest: Optional[str]
+    ) -> ChartRenderResult:
+        start_time = time.perf_counter()
+        path = self.path / "ondemand" / "chart" / name
+        out_path = path.with_suffix(".png")
+        try:
+            data = self.read_chart_file(path)
+            digest = hashlib.blake2b(
+                repr(RENDER_VERSION).encode() + data, digest_size=16
+            ).hexdigest()
+            if not force_update and digest == previous_digest and out_path.exists():
+                self.logger.debug(f'Chart already processed at "{path}".')
+                return ChartRenderResult(
+                    name, False, time.perf_counter() - start_time, digest
+                )
+            chart = Chart.from_msgpack(data, None)
+            chart.render().save(out_path)
+            self.logger.info(f'Chart rendered at "{path}".')
+            return ChartRenderResult(
+                name, True, time.perf_counter() - start_time, digest
+            )
+        except Exception as e:
+            self.logger.warning(f'Failed to render chart at "{path}": {e!r}')
+            return ChartRenderResult(
+                name, False, time.perf_counter() - start_time, error=repr(e)
+            )
+
+    def _render_charts(
+        self, method_name: str, arguments: Dict[str, tuple], workers: int
+    ) -> List[ChartRenderResult]:
+        """
+        Calls a render method with each set of arguments and the recorded digest of its image,
+        then records the digests of the rendered images in the render manifest.
+        """
+        manifest = RenderManifest(self.render_manifest_path)
+        arguments = {
+            image_name: (*args, manifest.get(image_name))
+            for image_name, args in arguments.items()
+        }
+        start_time = time.perf_counter()
+        results = list(
+            self._iter_on_pool(method_name, list(arguments.values()), workers)
+        )
+        for image_name, result in zip(arguments, results):
+            if result.digest:
+                manifest[image_name] = result.digest
+        manifest.save()
+        self.logger.info(
+            f"Rendered {sum(result.rendered for result in results)} of {len(results)} charts "
+            f"({sum(bool(result.error) for result in results)} failed) "
+            f"in {time.perf_counter() - start_time:.3f}s."
+        )
+        return results
+
+    def _iter_on_pool(
+        self, method_name: str, arguments: List[tuple], workers: int
+    ) -> Iterator[Any]:
+        """
+        Calls a method with each set of arguments, on a process pool if there is more than one worker,
+        yielding the results in order. Results are not kept once yielded, so they can be consumed as a stream.
+        Each pool process loads its own lazy asset manager with the same options, so arguments and results must be picklable.
+        """
+        if workers <= 1:
+            for args in arguments:
+                yield getattr(self, method_name)(*args)
+            return
+        options = {
+            "timezone": self.timezone,
+            "drop_extra_fields": self.drop_extra_fields,
+            "lazy": True,
+            "columnar": self.columnar,
+            "chart_archive": self.chart_archive is not None,
+        }
+        with ProcessPoolExecutor(
+            workers,
+            initializer=_init_pool_worker,
+            initargs=(str(self.path), options),
+        ) as executor:
+            futures = deque(
+                executor.submit(_call_pool_worker, method_name, *args)
+                for args in arguments
+            )
+            while futures:
+                yield futures.popleft().result()
 
     def __repr__(self):
         return (
             f"AssetManager(path = {repr(self.path)}, timezone = {repr(self.timezone)})"
         )
+
+
+# Asset manager of a pool worker process, created once per process by _init_pool_worker
+_pool_worker_assets: Optional[AssetManager] = None
+
+
+def _init_pool_worker(path: str, options: Dict[str, Any]):
+    global _pool_worker_assets
+    _pool_worker_assets = AssetManager(path, **options)
+
+
+def _call_pool_worker(method_name: str, *args) -> Any:
+    return getattr(_pool_worker_assets, method_name)(*args)
@@ -12,7 +12,7 @@ attribute_translations = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class AttributeMaster(MasterAsset):
     id: int
     name: str
@@ -1,7 +1,6 @@
 import datetime
 import enum
 from dataclasses import dataclass
-from functools import cached_property
 from typing import Dict, Any, Tuple, Optional
 
 import msgpack
@@ -10,10 +9,10 @@ import pytz
 from d4dj_utils.master.common_enums import GachaType, GachaCategory
 from d4dj_utils.master.event_master import EventMaster
 from d4dj_utils.master.gacha_master import GachaMaster
-from d4dj_utils.master.master_asset import MasterAsset
+from d4dj_utils.master.master_asset import MasterAsset, cached_property
 
 
-@dataclass
+@dataclass(slots=True)
 class CardMaster(MasterAsset):
     id: int
     rarity_id: int
@@ -35,6 +34,9 @@ class CardMaster(MasterAsset):
     can_use_common_card_stack_stock: bool = False
     is_permanent: Optional[bool] = None
 
+    index_fields = ["rarity_id", "attribute_id", "base_character_id", "start_date"]
+    columnar = True
+
     @classmethod
     def new(cls, *args, **kwargs):
         if isinstance(args[8], tuple):
@@ -117,30 +119,25 @@ class CardMaster(MasterAsset):
         return next(
             (
                 gacha
-                for gacha in self.assets.gacha_master.values()
-                if self in gacha.pick_up_cards and "★4" not in gacha.name
+                for gacha in self.assets.gacha_master.by("pick_up_card_ids", self.id)
+                if "★4" not in gacha.name
             ),
             None,
         )
 
     @cached_property
     def event(self) -> Optional[EventMaster]:
-        return next(
-            (
-                event
-                for event in self.assets.event_master.values()
-                if event.start_datetime - datetime.timedelta(days=2)
-                <= self.start_datetime
-                <= event.end_datetime
-            ),
-            None,
-        )
+        return self.assets.event_index.containing(self.start_datetime)
 
     @cached_property
     def availability(self):
+        return self.get_availability(self.gacha)
+
+    def get_availability(self, gacha: Optional[GachaMaster]) -> "CardAvailability":
+        """The availability of the card, given its pick up gacha as returned by the gacha property."""
         if self.start_datetime < self.initial_card_cutoff:
             return CardAvailability.Permanent
-        if gacha := self.gacha:
+        if gacha:
             if gacha.category == GachaCategory.Birthday:
                 return CardAvailability.Birthday
             elif any(n in gacha.summary for n in ["コラボ限定", "collaboration only"]):
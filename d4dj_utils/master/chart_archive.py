@@ -0,0 +1,95 @@
+import logging
+import re
+from pathlib import Path
+from typing import Optional, Tuple
+
+from d4dj_utils.master.master_snapshot import file_signature
+from d4dj_utils.packed_file import PackedFile, write_packed_file
+
+_chart_file_pattern = re.compile(r"chart_(\d+)")
+
+
+def chart_file_id(path: Path) -> Optional[int]:
+    """Returns the id in the name of a chart or common data file, or None for other files."""
+    match = _chart_file_pattern.fullmatch(path.name)
+    return int(match.group(1)) if match else None
+
+
+def write_chart_archive(charts_path: Path, path: Path) -> int:
+    """
+    Packs every chart and common data file in a directory into a single archive keyed by file id.
+    Each entry is tagged with the name, mtime and size of its source file.
+    Returns the number of files packed.
+    """
+    files = sorted(
+        (file_id, file_path)
+        for file_path in charts_path.glob("chart_*")
+        if (file_id := chart_file_id(file_path)) is not None and file_path.is_file()
+    )
+
+    def entries():
+        for file_id, file_path in files:
+            stat = file_path.stat()
+            yield file_id, (
+                file_path.name,
+                stat.st_mtime_ns,
+                stat.st_size,
+            ), file_path.read_bytes()
+
+    write_packed_file(path, entries())
+    return len(files)
+
+
+class ChartArchive:
+    """
+    Memory-mapped archive of chart and common data files, written by write_chart_archive.
+    Entries are only used while the loose file they were packed from is missing or unchanged,
+    so charts updated since the archive was written are read from disk.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._file: Optional[PackedFile] = None
+        if self.path.exists():
+            try:
+                self._file = PackedFile(self.path)
+            except (ValueError, OSError):
+                self.logger.warning(f'Ignoring unreadable chart archive "{self.path}".')
+
+    def __contains__(self, file_id: int):
+        return self._file is not None and file_id in self._file
+
+    def __len__(self):
+        return len(self._file) if self._file is not None else 0
+
+    def get(self, file_id: int) -> Optional[memoryview]:
+        """Returns the contents of a file as a view into the archive, or None if it is not archived."""
+        if self._file is None:
+            return None
+        return self._file.get(file_id)
+
+    def signature(self, file_id: int) -> Optional[Tuple[str, int, int]]:
+        """Returns the name, mtime and size of the source file of an entry, or None if it is not archived."""
+        if file_id not in self:
+            return None
+        return tuple(self._file.metadata(file_id))
+
+    def current_signature(self, path: Path) -> Optional[Tuple[str, int, int]]:
+        """
+        Returns the signature of the archived entry for a file if it is up to date, or None if the file is not archived
+        or the loose file has changed since it was packed.
+        """
+        signature = self.signature(chart_file_id(path))
+        if signature is None:
+            return None
+        try:
+            loose_signature = file_signature([path])[0]
+        except FileNotFoundError:
+            return signature
+        return signature if loose_signature == signature else None
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
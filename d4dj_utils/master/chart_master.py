@@ -1,17 +1,26 @@
+import hashlib
 import math
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Sequence, TYPE_CHECKING
 
 from PIL import Image, ImageDraw
 
-from d4dj_utils.chart.chart import Chart, ChartCommonData
+from d4dj_utils.chart.chart import (
+    RENDER_VERSION,
+    Chart,
+    ChartCommonData,
+    ChartStatistics,
+)
 from d4dj_utils.master.common_enums import ChartSectionType
 from d4dj_utils.master.master_asset import MasterAsset
 
+if TYPE_CHECKING:
+    from d4dj_utils.chart.score_calculator import ChartScoringData
 
-@dataclass
+
+@dataclass(slots=True)
 class ChartMaster(MasterAsset):
     id: int
     music_id: int
@@ -115,52 +124,233 @@ class ChartMaster(MasterAsset):
     def mix_path(self) -> Path:
         return self.chart_path.with_suffix(".mix.png")
 
-    def load_chart_data(self):
-        with self.chart_path.open("rb") as f:
-            try:
-                with self.common_data_path.open("rb") as cdf:
-                    info = ChartCommonData.from_msgpack(cdf.read()).get_chart_info(self)
-            except FileNotFoundError:
-                if self.music.duration:
-                    info = ChartCommonData.get_default_for_chart(self).get_chart_info(
-                        self
-                    )
-                else:
-                    info = None
-            return Chart.from_msgpack(f.read(), info)
-
-    def load_common_data(self):
+    def _cache_key(self, kind: str, *paths: Path):
+        """Identifies the current version of the given files, which may not exist, for the chart cache."""
+        return (
+            kind,
+            self.id,
+            *((str(path), self.assets.chart_file_signature(path)) for path in paths),
+        )
+
+    def _check_music_duration(self) -> Optional[Tuple[str, int, int]]:
+        """
+        Identifies the audio metadata file chart info and default common data depend on, if the music exists,
+        refreshing the cached duration of the music if the file changed.
+        """
+        music = self.assets.music_master.get(self.music_id)
+        return music.check_duration_file() if music else None
+
+    def load_chart_data(self) -> Chart:
+        """Loads the chart with its common data. Results are cached on the asset manager and must not be modified."""
+        return self.assets.chart_cache.get(
+            self._cache_key("chart", self.chart_path, self.common_data_path)
+            + (self._check_music_duration(),),
+            self._read_chart_data,
+        )
+
+    def _read_chart_data(self) -> Chart:
+        chart_data = self.assets.read_chart_file(self.chart_path)
         try:
-            with self.common_data_path.open("rb") as cdf:
-                return ChartCommonData.from_msgpack(cdf.read())
+            info = ChartCommonData.from_msgpack(
+                self.assets.read_chart_file(self.common_data_path)
+            ).get_chart_info(self)
+        except FileNotFoundError:
+            if self.music.duration:
+                info = ChartCommonData.get_default_for_chart(self).get_chart_info(self)
+            else:
+                info = None
+        return Chart.from_msgpack(chart_data, info)
+
+    def load_common_data(self) -> Optional[ChartCommonData]:
+        """Loads the common data of the chart. Results are cached on the asset manager and must not be modified."""
+        return self.assets.chart_cache.get(
+            self._cache_key("common_data", self.common_data_path)
+            + (self._check_music_duration(),),
+            self._read_common_data,
+        )
+
+    def _read_common_data(self) -> Optional[ChartCommonData]:
+        try:
+            return ChartCommonData.from_msgpack(
+                self.assets.read_chart_file(self.common_data_path)
+            )
         except FileNotFoundError:
             if self.music.duration:
                 return ChartCommonData.get_default_for_chart(self)
             else:
                 return None
 
-    def load_sections(self) -> Optional[List[Chart]]:
-        if not self.mix_info:
-            return None
+    def get_render_digest(self) -> str:
+        """
+        Hashes the inputs of the chart and mix images: the chart and common data files,
+        the master values chart info and mix sections are derived from, and the renderer version.
+        """
+        self._check_music_duration()
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((RENDER_VERSION, self, self.music.duration)).encode())
+        digest.update(repr(list(self.mix_info.items())).encode())
+        self._update_file_digest(digest)
+        return digest.hexdigest()
+
+    def get_scoring_digest(
+        self, skill_durations: Sequence[float], file_digest: Optional[bytes] = None
+    ) -> str:
+        """
+        Hashes the inputs of the scoring data for the given skill durations: the chart and common data files,
+        the master values chart info is derived from, and the scoring data version.
+        file_digest may be passed to reuse a result of get_file_digest for many sets of skill durations.
+        """
+        from d4dj_utils.chart.score_calculator import SCORING_VERSION
+
+        # get_file_digest also checks the audio metadata file the music duration is read from
+        file_digest = file_digest or self.get_file_digest()
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(
+            repr(
+                (SCORING_VERSION, self, self.music.duration, tuple(skill_durations))
+            ).encode()
+        )
+        digest.update(file_digest)
+        return digest.hexdigest()
+
+    def get_file_digest(self) -> bytes:
+        """
+        Hashes the chart and common data files.
+        Results are cached on the asset manager until either file changes, so repeated calls only check file signatures.
+        """
+        self._check_music_duration()
+        signature = (
+            self.assets.chart_file_signature(self.chart_path),
+            self.assets.chart_file_signature(self.common_data_path),
+        )
+        cache = self.assets.chart_file_digest_cache
+        if self.id in cache and cache[self.id][0] == signature:
+            return cache[self.id][1]
+        digest = hashlib.blake2b(digest_size=16)
+        self._update_file_digest(digest)
+        cache[self.id] = (signature, digest.digest())
+        return cache[self.id][1]
+
+    def _update_file_digest(self, digest):
+        digest.update(self.assets.read_chart_file(self.chart_path))
+        try:
+            common_data = self.assets.read_chart_file(self.common_data_path)
+            digest.update(len(common_data).to_bytes(8, "little"))
+            digest.update(common_data)
+        except FileNotFoundError:
+            digest.update(b"\0" * 8)
+
+    def load_scoring_data(
+        self, skill_durations: Sequence[float]
+    ) -> Optional["ChartScoringData"]:
+        """
+        Loads the scoring data of the chart for the given skill durations, or None if the chart has no chart info.
+        Results are cached on the asset manager and must not be modified.
+        Cache lookups only check file signatures, as the digest of the chart files is cached with get_file_digest.
+        Tables are read from the asset manager's precomputed scoring tables if loaded.
+        If the asset manager has a scoring table store, tables are also read from and saved to it,
+        so the chart does not need to be simulated again in later sessions.
+        """
+        skill_durations = tuple(float(duration) for duration in skill_durations)
+        key = self.get_scoring_key(skill_durations)
+        return self.assets.scoring_cache.get(
+            ("scoring_data", key),
+            lambda: self._read_scoring_data(skill_durations, key),
+        )
+
+    def get_scoring_key(
+        self, skill_durations: Tuple[float, ...], file_digest: Optional[bytes] = None
+    ) -> str:
+        """Identifies the scoring table of the chart for the given skill durations, in stores and precomputed tables."""
+        return f"{self.id}_{self.get_scoring_digest(skill_durations, file_digest)}"
+
+    def _read_scoring_data(
+        self, skill_durations: Tuple[float, ...], key: str
+    ) -> Optional["ChartScoringData"]:
+        from d4dj_utils.chart.score_calculator import (
+            ChartScoringTable,
+            get_chart_scoring_table,
+        )
+
+        tables = self.assets.scoring_tables
+        if tables and (data := tables.get(key)) is not None:
+            return ChartScoringTable.from_msgpack(data).to_scoring_data()
+        store = self.assets.scoring_table_store
+        if store and (data := store.get(key)) is not None:
+            try:
+                return ChartScoringTable.from_msgpack(data).to_scoring_data()
+            except (ValueError, TypeError):
+                store.discard(key)
         chart = self.load_chart_data()
-        return [
-            chart.trim(
+        if not chart.info:
+            return None
+        table = get_chart_scoring_table(chart, skill_durations)
+        if store:
+            store.put(key, table.to_msgpack())
+        return table.to_scoring_data()
+
+    @property
+    def section_windows(self) -> Dict[ChartSectionType, Tuple[float, float]]:
+        """The start and end times of each mix section of this chart."""
+        return {
+            section: (
                 mi.start_time - 60 / mi.start_time_bpm / 8,
                 mi.end_time - 60 / mi.end_time_bpm / 8,
             )
-            for mi in self.mix_info.values()
-        ]
+            for section, mi in self.mix_info.items()
+        }
 
-    def load_section(self, section) -> Optional[List[Chart]]:
+    def load_sections(self, chart: Optional[Chart] = None) -> Optional[List[Chart]]:
+        """Trims the chart to each mix section, using the given chart instead of loading it if provided."""
         if not self.mix_info:
             return None
-        chart = self.load_chart_data()
-        mi = self.mix_info[section]
-        return chart.trim(
-            mi.start_time - 60 / mi.start_time_bpm / 8,
-            mi.end_time - 60 / mi.end_time_bpm / 8,
+        if chart is None:
+            chart = self.load_chart_data()
+        return chart.trim_many(list(self.section_windows.values()))
+
+    def load_section(self, section, chart: Optional[Chart] = None) -> Optional[Chart]:
+        """Trims the chart to a mix section, using the given chart instead of loading it if provided."""
+        if not self.mix_info:
+            return None
+        if chart is None:
+            chart = self.load_chart_data()
+        return chart.trim(*self.section_windows[section])
+
+    def load_notes(self) -> Chart:
+        """Loads the chart without common data, which is enough for note statistics."""
+        return self.assets.chart_cache.get(
+            self._cache_key("notes", self.chart_path),
+            lambda: Chart.from_msgpack(
+                self.assets.read_chart_file(self.chart_path), None
+            ),
         )
 
+    @property
+    def statistics(self) -> Optional[ChartStatistics]:
+        """
+        Note statistics of the chart file, or None if it does not exist.
+        Results are cached on the asset manager until the chart file changes.
+        """
+        file_signature = self.assets.chart_file_signature(self.chart_path)
+        if file_signature is None:
+            return None
+        signature = (file_signature,)
+        cache = self.assets.chart_statistics_cache
+        if self.id in cache and cache[self.id][0] == signature:
+            return cache[self.id][1]
+        statistics = self.load_notes().get_statistics()
+        cache[self.id] = (signature, statistics)
+        return statistics
+
+    def get_section_note_counts(self) -> Dict[ChartSectionType, int]:
+        """Counts the notes of the full chart and of each mix section, as in ChartNoteCountMaster."""
+        chart = self.load_notes()
+        windows = self.section_windows
+        return {
+            ChartSectionType.Full: len(chart.notes),
+            **dict(zip(windows, chart.count_trimmed_notes(list(windows.values())))),
+        }
+
     @staticmethod
     def render_sections(sections: List[Chart]) -> Image:
         padding = 80
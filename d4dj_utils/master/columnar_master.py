@@ -0,0 +1,439 @@
+import dataclasses
+import datetime
+import sys
+import weakref
+from collections.abc import ItemsView, Mapping, ValuesView
+from pathlib import Path
+from typing import Dict, Any, List, Type, Optional, Union, Sequence
+
+import msgpack
+import numpy as np
+
+import d4dj_utils.master.master_asset as ma
+
+
+class _Column:
+    def __init__(self, values: List[Any]):
+        self.values = values
+
+    def get(self, index: int):
+        return self.values[index]
+
+    def array(self) -> np.ndarray:
+        array = np.empty(len(self.values), dtype=object)
+        array[:] = self.values
+        return array
+
+    @property
+    def nbytes(self) -> int:
+        # Only the list itself, since the values are usually shared with other rows
+        return sys.getsizeof(self.values)
+
+
+class _NumericColumn(_Column):
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    def get(self, index: int):
+        return self.values[index].item()
+
+    def array(self) -> np.ndarray:
+        return self.values
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+
+class _TupleColumn(_NumericColumn):
+    """Tuples of ints with the same length in every row, stored as a 2d array."""
+
+    def get(self, index: int):
+        return tuple(self.values[index].tolist())
+
+
+class _StringColumn(_Column):
+    def __init__(self, values: List[str]):
+        codes = {}
+        self.pool = []
+        for value in values:
+            if value not in codes:
+                codes[value] = len(self.pool)
+                self.pool.append(sys.intern(value))
+        self.codes = np.array(
+            [codes[value] for value in values], dtype=_int_dtype(len(self.pool))
+        )
+
+    def get(self, index: int):
+        return self.pool[self.codes[index]]
+
+    def array(self) -> np.ndarray:
+        pool = np.empty(len(self.pool), dtype=object)
+        pool[:] = self.pool
+        return pool[self.codes]
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.codes.nbytes
+            + sys.getsizeof(self.pool)
+            + sum(sys.getsizeof(value) for value in self.pool)
+        )
+
+
+class _TimestampColumn(_Column):
+    def __init__(self, values: List[msgpack.Timestamp]):
+        self.seconds = np.array([value.seconds for value in values], dtype=np.int64)
+        self.nanoseconds = np.array(
+            [value.nanoseconds for value in values], dtype=np.uint32
+        )
+
+    def get(self, index: int):
+        return msgpack.Timestamp(
+            self.seconds[index].item(), self.nanoseconds[index].item()
+        )
+
+    def array(self) -> np.ndarray:
+        """Nanoseconds since the epoch, as stored in the master (not adjusted for timezone)."""
+        return self.seconds * 1_000_000_000 + self.nanoseconds
+
+    @property
+    def nbytes(self) -> int:
+        return self.seconds.nbytes + self.nanoseconds.nbytes
+
+
+def _int_dtype(max_value: int, min_value: int = 0):
+    for dtype in (np.int8, np.int16, np.int32, np.int64):
+        info = np.iinfo(dtype)
+        if info.min <= min_value and max_value <= info.max:
+            return dtype
+    return None
+
+
+def _make_column(values: List[Any]) -> _Column:
+    if not values:
+        return _Column(values)
+    types = {type(value) for value in values}
+    if types == {bool}:
+        return _NumericColumn(np.array(values, dtype=np.bool_))
+    if types == {int}:
+        dtype = _int_dtype(max(values), min(values))
+        if dtype is not None:
+            return _NumericColumn(np.array(values, dtype=dtype))
+    if types == {float}:
+        return _NumericColumn(np.array(values, dtype=np.float64))
+    if types == {str}:
+        return _StringColumn(values)
+    if types == {msgpack.Timestamp}:
+        return _TimestampColumn(values)
+    if (
+        types == {tuple}
+        and len({len(value) for value in values}) == 1
+        and len(values[0])
+        and all(type(element) is int for value in values for element in value)
+    ):
+        dtype = _int_dtype(
+            max(max(value) for value in values), min(min(value) for value in values)
+        )
+        if dtype is not None:
+            return _TupleColumn(np.array(values, dtype=dtype))
+    return _Column(values)
+
+
+class _ColumnStore:
+    """
+    The columns of one version of a master. Row views keep the store they were created from.
+    Cached values of rows are kept here by row index, so they outlive the views they were computed on.
+    """
+
+    def __init__(self, row_class: Type[ma.MasterAsset], rows: Sequence[ma.MasterAsset]):
+        self.row_class = row_class
+        self.field_names = [field.name for field in dataclasses.fields(row_class)]
+        self.columns: Dict[str, _Column] = {
+            name: _make_column([getattr(row, name) for row in rows])
+            for name in self.field_names
+        }
+        self.assets = rows[0].assets if rows else None
+        self.view_class = _view_class(row_class)
+        self.views = weakref.WeakValueDictionary()
+        self.caches: Dict[int, dict] = {}
+
+    def row(self, index: int) -> ma.MasterAsset:
+        view = self.views.get(index)
+        if view is None:
+            view = object.__new__(self.view_class)
+            view._store = self
+            view._index = index
+            self.views[index] = view
+        return view
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values()) + sum(
+            sys.getsizeof(cache) for cache in self.caches.values()
+        )
+
+
+class _FieldView:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return instance._store.columns[self.name].get(instance._index)
+
+    def __set__(self, instance, value):
+        raise AttributeError(
+            f"Cannot assign {self.name} on a columnar row, assign a new row to the master instead."
+        )
+
+
+def _get_view_cache(view) -> Optional[dict]:
+    return view._store.caches.get(view._index)
+
+
+def _set_view_cache(view, cache: Optional[dict]):
+    if cache is None:
+        view._store.caches.pop(view._index, None)
+    else:
+        view._store.caches[view._index] = cache
+
+
+_view_classes: Dict[type, type] = {}
+
+
+def _row_class(value: ma.MasterAsset) -> Type[ma.MasterAsset]:
+    return getattr(type(value), "_columnar_row_class", type(value))
+
+
+def _view_class(row_class: Type[ma.MasterAsset]) -> type:
+    """
+    Subclass of a row class where fields are read from the columns of a master.
+    Methods and properties of the row class work unchanged on instances.
+    """
+    if row_class in _view_classes:
+        return _view_classes[row_class]
+    field_names = [field.name for field in dataclasses.fields(row_class)]
+
+    def __eq__(self, other):
+        if isinstance(other, row_class):
+            return all(
+                getattr(self, name) == getattr(other, name) for name in field_names
+            )
+        return NotImplemented
+
+    namespace = {
+        "__slots__": ("_store", "_index"),
+        "__module__": row_class.__module__,
+        "__qualname__": row_class.__qualname__,
+        "__eq__": __eq__,
+        "__hash__": row_class.__hash__,
+        "_columnar_row_class": row_class,
+        "assets": property(lambda self: self._store.assets),
+        "_cache": property(_get_view_cache, _set_view_cache),
+        **{name: _FieldView(name) for name in field_names},
+    }
+    view_class = type(row_class.__name__, (row_class,), namespace)
+    _view_classes[row_class] = view_class
+    return view_class
+
+
+class ColumnarMasterDict(ma.MasterDict):
+    """
+    Master dict that stores the fields of its rows in columns instead of one object per row.
+    Ints, floats, bools, timestamps and fixed length int tuples are stored in numpy arrays,
+    and strings as codes into a pool of interned strings.
+    Rows are views into the columns, created on access, and can not be modified in place.
+    The dict itself maps keys to row indexes, so every method that exposes values is overridden
+    to return rows instead, including iteration, comparison and repr, which dict would otherwise
+    serve from its own storage.
+    """
+
+    def __init__(self, base: Dict[Any, ma.MasterAsset], name: str, path: Path):
+        super().__init__({}, name, path)
+        self._store: Optional[_ColumnStore] = None
+        self._epochs = None
+        self.replace(base)
+
+    @staticmethod
+    def can_store(values: Dict[Any, ma.MasterAsset]) -> bool:
+        return len({_row_class(value) for value in values.values()}) == 1
+
+    def replace(self, values: Dict[Any, ma.MasterAsset]):
+        rows = list(values.values())
+        if not self.can_store(values) and rows:
+            raise TypeError(f"Rows of {self.name} do not share a single class.")
+        self._clear_indexes()
+        self._epochs = None
+        self._store = _ColumnStore(_row_class(rows[0]), rows) if rows else None
+        dict.clear(self)
+        dict.update(self, ((key, index) for index, key in enumerate(values)))
+
+    def _rows(self) -> Dict[Any, ma.MasterAsset]:
+        return {key: self[key] for key in self}
+
+    def __getitem__(self, key):
+        return self._store.row(dict.__getitem__(self, key))
+
+    def get(self, key, default=None):
+        index = dict.get(self, key)
+        return default if index is None else self._store.row(index)
+
+    def __iter__(self):
+        # Not inherited from dict, so dict(self), {**self} and dict.update use __getitem__
+        return iter(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, Mapping):
+            return self._rows() == dict(other.items())
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self._rows())
+
+    def __or__(self, other):
+        if isinstance(other, Mapping):
+            return self._rows() | dict(other.items())
+        return NotImplemented
+
+    def __ror__(self, other):
+        if isinstance(other, Mapping):
+            return dict(other.items()) | self._rows()
+        return NotImplemented
+
+    def values(self):
+        return ValuesView(self)
+
+    def items(self):
+        return ItemsView(self)
+
+    def copy(self):
+        return self._rows()
+
+    def __setitem__(self, key, value):
+        rows = self._rows()
+        rows[key] = value
+        self.replace(rows)
+
+    def __delitem__(self, key):
+        rows = self._rows()
+        del rows[key]
+        self.replace(rows)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        self.replace({})
+
+    def update(self, *args, **kwargs):
+        rows = self._rows()
+        rows.update(*args, **kwargs)
+        self.replace(rows)
+
+    def pop(self, key, *args):
+        rows = self._rows()
+        value = rows.pop(key, *args)
+        self.replace(rows)
+        return value
+
+    def popitem(self):
+        rows = self._rows()
+        item = rows.popitem()
+        self.replace(rows)
+        return item
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory used by the columns, cached row values and the dict of keys to row indexes,
+        including index ints too large to be shared.
+        """
+        return (
+            (self._store.nbytes if self._store else 0)
+            + sys.getsizeof(self)
+            + sum(sys.getsizeof(index) for index in dict.values(self) if index > 256)
+        )
+
+    def column(self, field: str) -> np.ndarray:
+        """
+        Returns the values of a field as an array in master order.
+        Tuple fields are returned as 2d arrays, and timestamps as nanoseconds since the epoch.
+        The returned array must not be modified.
+        """
+        if self._store is None:
+            return np.empty(0)
+        return self._store.columns[field].array()
+
+    def select(
+        self, selection: Union[np.ndarray, Sequence[int]]
+    ) -> List[ma.MasterAsset]:
+        """Returns the rows selected by a boolean mask or positions in master order."""
+        if self._store is None:
+            return []
+        selection = np.asarray(selection)
+        if selection.dtype == np.bool_:
+            selection = np.flatnonzero(selection)
+        return [self._store.row(index) for index in selection.tolist()]
+
+    def counts(self, field: str) -> Dict[Any, int]:
+        """Returns the number of rows with each value of a field."""
+        values, counts = np.unique(self.column(field), return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
+
+    def sums(self, value_field: str, key_field: str) -> Dict[Any, Any]:
+        """Returns the sum of a field over the rows with each value of another field."""
+        values = self.column(value_field)
+        keys, inverse = np.unique(self.column(key_field), return_inverse=True)
+        sums = np.zeros(
+            len(keys), dtype=np.float64 if values.dtype.kind == "f" else np.int64
+        )
+        np.add.at(sums, inverse, values)
+        return dict(zip(keys.tolist(), sums.tolist()))
+
+    def max_powers(self) -> np.ndarray:
+        """
+        Returns the max_power of each row in master order, as for CardMaster,
+        summed from the max_parameters column.
+        """
+        parameters = self.column("max_parameters") if self._store else np.empty((0, 0))
+        if parameters.ndim == 2:
+            return parameters.sum(axis=1, dtype=np.int64)
+        # Parameters of different lengths are not stored as a 2d array
+        return np.array([sum(value) for value in parameters.tolist()], dtype=np.int64)
+
+    def _get_epochs(self):
+        if self._epochs is None:
+            values = list(self.values())
+            has_start = np.array([value.start_epoch_us is not None for value in values])
+            self._epochs = (
+                has_start,
+                np.array(
+                    [value.start_epoch_us or 0 for value in values], dtype=np.int64
+                ),
+                np.array([value.end_epoch_us or 0 for value in values], dtype=np.int64),
+            )
+        return self._epochs
+
+    def released_at(self, time: Optional[datetime.datetime] = None) -> List[ma.VT]:
+        epoch = ma.now_epoch_us() if time is None else ma.datetime_to_epoch_us(time)
+        has_start, starts, _ends = self._get_epochs()
+        return self.select(~has_start | (starts < epoch))
+
+    def available_at(self, time: Optional[datetime.datetime] = None) -> List[ma.VT]:
+        epoch = ma.now_epoch_us() if time is None else ma.datetime_to_epoch_us(time)
+        has_start, starts, ends = self._get_epochs()
+        return self.select(~has_start | ((starts < epoch) & (epoch < ends)))
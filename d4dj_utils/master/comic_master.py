@@ -6,7 +6,7 @@ import msgpack
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class ComicMaster(MasterAsset):
     id: int
     title: str
@@ -4,7 +4,7 @@ from typing import Dict, Any
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class CommandMaster(MasterAsset):
     id: int
     title: str
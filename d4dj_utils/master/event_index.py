@@ -0,0 +1,74 @@
+import datetime
+from bisect import bisect_right
+from typing import List, Iterable, Optional, TYPE_CHECKING
+
+import d4dj_utils.master.master_asset as ma
+
+if TYPE_CHECKING:
+    from d4dj_utils.master.event_master import EventMaster
+
+
+class EventIndex:
+    """
+    Interval index over event time windows.
+    An event's window starts two days before its start date, to include cards and gachas released just before it,
+    and ends at its end date, both inclusive.
+    Where windows overlap, lookups prefer the event that comes first in the master.
+    """
+
+    lead_time = datetime.timedelta(days=2)
+
+    def __init__(self, events: Iterable["EventMaster"]):
+        windows = sorted(
+            (
+                (
+                    event.start_epoch_us
+                    - self.lead_time // datetime.timedelta(microseconds=1),
+                    event.end_epoch_us,
+                    order,
+                    event,
+                )
+                for order, event in enumerate(events)
+            ),
+            key=lambda window: window[0],
+        )
+        self._starts = [start for start, _end, _order, _event in windows]
+        self._ends = [end for _start, end, _order, _event in windows]
+        self._orders = [order for _start, _end, order, _event in windows]
+        self._events = [event for _start, _end, _order, event in windows]
+        # Running maximum of end bounds, so a backwards scan can stop
+        # once no earlier window reaches the queried time.
+        self._max_ends = []
+        max_end = None
+        for end in self._ends:
+            max_end = end if max_end is None else max(max_end, end)
+            self._max_ends.append(max_end)
+
+    def __len__(self):
+        return len(self._events)
+
+    def _matching_indexes(self, start: int, end: int) -> List[int]:
+        matches = []
+        i = bisect_right(self._starts, end) - 1
+        while i >= 0 and self._max_ends[i] >= start:
+            if self._ends[i] >= start:
+                matches.append(i)
+            i -= 1
+        return sorted(matches, key=lambda index: self._orders[index])
+
+    def containing(self, time: datetime.datetime) -> Optional["EventMaster"]:
+        """Returns the event whose window contains the given time, if any."""
+        epoch = ma.datetime_to_epoch_us(time)
+        matches = self._matching_indexes(epoch, epoch)
+        return self._events[matches[0]] if matches else None
+
+    def overlapping(
+        self, start: datetime.datetime, end: datetime.datetime
+    ) -> List["EventMaster"]:
+        """Returns the events whose windows overlap [start, end], in master order."""
+        return [
+            self._events[i]
+            for i in self._matching_indexes(
+                ma.datetime_to_epoch_us(start), ma.datetime_to_epoch_us(end)
+            )
+        ]
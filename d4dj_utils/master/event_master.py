@@ -9,7 +9,7 @@ from d4dj_utils.master.common_enums import EventType
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class EventMaster(MasterAsset):
     id: int
     name: str
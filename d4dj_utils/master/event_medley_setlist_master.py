@@ -8,7 +8,7 @@ from d4dj_utils.master.event_specific_bonus_master import ParameterBonus
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class EventMedleySetlistMaster(MasterAsset):
     id: int
     name: str
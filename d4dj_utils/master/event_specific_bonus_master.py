@@ -7,7 +7,7 @@ from d4dj_utils.master.master_asset import MasterAsset
 from d4dj_utils.master.parameter_bonus_master import ParameterBonusMaster
 
 
-@dataclass
+@dataclass(slots=True)
 class EventSpecificBonusMaster(MasterAsset):
     id: int = -1
     character_ids: Tuple[int] = ()
@@ -8,7 +8,7 @@ from d4dj_utils.master.master_asset import MasterAsset
 from d4dj_utils.master.mission_group_master import DateSelectCategory
 
 
-@dataclass
+@dataclass(slots=True)
 class ExchangeItemMaster(MasterAsset):
     id: int
     exchange_id: int
@@ -30,6 +30,8 @@ class ExchangeItemMaster(MasterAsset):
     required_stock_id_4: int
     required_stock_amount_4: int
 
+    columnar = True
+
     def __hash__(self):
         return self.id.__hash__()
 
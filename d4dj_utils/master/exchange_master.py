@@ -6,7 +6,7 @@ import msgpack
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class ExchangeMaster(MasterAsset):
     id: int
     name: str
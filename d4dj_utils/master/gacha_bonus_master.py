@@ -5,7 +5,7 @@ from typing import Dict, Any, Tuple
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class GachaBonusMaster(MasterAsset):
     gacha_id: int
     is_main: bool
@@ -31,16 +31,7 @@ class GachaBonusMaster(MasterAsset):
 
     @property
     def tables(self):
-        cur = self.assets.db.cursor()
-        return [
-            [
-                self.assets.gacha_table_master[gtmid[0]]
-                for gtmid in cur.execute(
-                    "SELECT id FROM GachaTableMaster WHERE table_id=?", [tid]
-                )
-            ]
-            for tid in self.table_ids
-        ]
+        return self.assets.get_gacha_tables(self.table_ids)
 
     @property
     def one_line_description_items(self) -> Dict[str, Any]:
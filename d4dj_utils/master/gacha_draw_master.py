@@ -4,7 +4,7 @@ from typing import Dict, Any, Tuple
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class GachaDrawMaster(MasterAsset):
     id: int
     gacha_id: int
@@ -17,6 +17,7 @@ class GachaDrawMaster(MasterAsset):
     roulette_rates: Tuple[int, ...] = ()
 
     db_fields = ["id", "gacha_id"]
+    index_fields = ["gacha_id"]
 
     def __hash__(self):
         return self.id.__hash__()
@@ -1,7 +1,5 @@
 import dataclasses
-import datetime
 from dataclasses import dataclass
-from functools import cached_property
 from typing import Dict, Any, Tuple, Sequence, TYPE_CHECKING, Union, Optional
 
 import msgpack
@@ -9,10 +7,12 @@ import msgpack
 from d4dj_utils.master.common_enums import GachaType, GachaCategory
 from d4dj_utils.master.event_master import EventMaster
 from d4dj_utils.master.gacha_bonus_master import GachaBonusMaster
-from d4dj_utils.master.master_asset import MasterAsset
+from d4dj_utils.master.master_asset import MasterAsset, cached_property
 
 
 class GachaMaster:
+    __slots__ = ()
+
     def __new__(cls, *args, **kwargs):
         if (
             isinstance(args[8], bool)
@@ -27,7 +27,7 @@ class GachaMaster:
             return GachaMasterLegacy(*args, **kwargs)
 
 
-@dataclass
+@dataclass(slots=True)
 class GachaMasterA(GachaMaster, MasterAsset):
     id: int
     name: str
@@ -66,6 +66,8 @@ class GachaMasterA(GachaMaster, MasterAsset):
     end_change_stock_item_id: Any = None
     end_change_stock_item_amount: Any = None
 
+    index_fields = ["pick_up_card_ids"]
+
     def __new__(cls, *args, **kwargs):
         return object.__new__(cls)
 
@@ -88,16 +90,7 @@ class GachaMasterA(GachaMaster, MasterAsset):
 
     @property
     def tables(self):
-        cur = self.assets.db.cursor()
-        return [
-            [
-                self.assets.gacha_table_master[gtmid[0]]
-                for gtmid in cur.execute(
-                    "SELECT id FROM GachaTableMaster WHERE table_id=?", [tid]
-                )
-            ]
-            for tid in self.table_ids
-        ]
+        return self.assets.get_gacha_tables(self.table_ids)
 
     @property
     def pick_up_cards(self):
@@ -132,26 +125,11 @@ class GachaMasterA(GachaMaster, MasterAsset):
 
     @property
     def draw_data(self):
-        cur = self.assets.db.cursor()
-        return [
-            self.assets.gacha_draw_master[gdmid[0]]
-            for gdmid in cur.execute(
-                "SELECT id FROM GachaDrawMaster WHERE gacha_id=?", [self.id]
-            )
-        ]
+        return list(self.assets.gacha_draw_master.by("gacha_id", self.id))
 
     @cached_property
     def event(self) -> Optional[EventMaster]:
-        return next(
-            (
-                event
-                for event in self.assets.event_master.values()
-                if event.start_datetime - datetime.timedelta(days=2)
-                <= self.start_datetime
-                <= event.end_datetime
-            ),
-            None,
-        )
+        return self.assets.event_index.containing(self.start_datetime)
 
     @property
     def summary(self):
@@ -198,7 +176,7 @@ class GachaMasterA(GachaMaster, MasterAsset):
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class GachaMasterNew(GachaMaster, MasterAsset):
     id: int
     name: str
@@ -234,6 +212,8 @@ class GachaMasterNew(GachaMaster, MasterAsset):
     unknown6: Any = None
     unknown7: Any = None
 
+    index_fields = ["pick_up_card_ids"]
+
     def __new__(cls, *args, **kwargs):
         return object.__new__(cls)
 
@@ -256,16 +236,7 @@ class GachaMasterNew(GachaMaster, MasterAsset):
 
     @property
     def tables(self):
-        cur = self.assets.db.cursor()
-        return [
-            [
-                self.assets.gacha_table_master[gtmid[0]]
-                for gtmid in cur.execute(
-                    "SELECT id FROM GachaTableMaster WHERE table_id=?", [tid]
-                )
-            ]
-            for tid in self.table_ids
-        ]
+        return self.assets.get_gacha_tables(self.table_ids)
 
     @property
     def pick_up_cards(self):
@@ -300,13 +271,11 @@ class GachaMasterNew(GachaMaster, MasterAsset):
 
     @property
     def draw_data(self):
-        cur = self.assets.db.cursor()
-        return [
-            self.assets.gacha_draw_master[gdmid[0]]
-            for gdmid in cur.execute(
-                "SELECT id FROM GachaDrawMaster WHERE gacha_id=?", [self.id]
-            )
-        ]
+        return list(self.assets.gacha_draw_master.by("gacha_id", self.id))
+
+    @cached_property
+    def event(self) -> Optional[EventMaster]:
+        return self.assets.event_index.containing(self.start_datetime)
 
     @property
     def banner_path(self):
@@ -349,7 +318,7 @@ class GachaMasterNew(GachaMaster, MasterAsset):
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class GachaMasterLegacy(GachaMaster, MasterAsset):
     id: int
     name: str
@@ -392,6 +361,8 @@ class GachaMasterLegacy(GachaMaster, MasterAsset):
     main_bonus_frame_text: str = ""
     sub_bonus_frame_text: str = ""
 
+    index_fields = ["pick_up_card_ids"]
+
     def __new__(cls, *args, **kwargs):
         return object.__new__(cls)
 
@@ -434,16 +405,7 @@ class GachaMasterLegacy(GachaMaster, MasterAsset):
 
     @property
     def tables(self):
-        cur = self.assets.db.cursor()
-        return [
-            [
-                self.assets.gacha_table_master[gtmid[0]]
-                for gtmid in cur.execute(
-                    "SELECT id FROM GachaTableMaster WHERE table_id=?", [tid]
-                )
-            ]
-            for tid in self.table_ids
-        ]
+        return self.assets.get_gacha_tables(self.table_ids)
 
     @property
     def pick_up_cards(self):
@@ -455,16 +417,7 @@ class GachaMasterLegacy(GachaMaster, MasterAsset):
 
     @property
     def bonus_tables(self):
-        cur = self.assets.db.cursor()
-        return [
-            [
-                self.assets.gacha_table_master[gtmid[0]]
-                for gtmid in cur.execute(
-                    "SELECT id FROM GachaTableMaster WHERE table_id=?", [tid]
-                )
-            ]
-            for tid in self.bonus_table_ids
-        ]
+        return self.assets.get_gacha_tables(self.bonus_table_ids)
 
     @property
     def sub_bonus_table_rate(self):
@@ -472,16 +425,7 @@ class GachaMasterLegacy(GachaMaster, MasterAsset):
 
     @property
     def sub_bonus_tables(self):
-        cur = self.assets.db.cursor()
-        return [
-            [
-                self.assets.gacha_table_master[gtmid[0]]
-                for gtmid in cur.execute(
-                    "SELECT id FROM GachaTableMaster WHERE table_id=?", [tid]
-                )
-            ]
-            for tid in self.sub_bonus_table_ids
-        ]
+        return self.assets.get_gacha_tables(self.sub_bonus_table_ids)
 
     @property
     def gacha_type(self):
@@ -516,13 +460,7 @@ class GachaMasterLegacy(GachaMaster, MasterAsset):
 
     @property
     def draw_data(self):
-        cur = self.assets.db.cursor()
-        return [
-            self.assets.gacha_draw_master[gdmid[0]]
-            for gdmid in cur.execute(
-                "SELECT id FROM GachaDrawMaster WHERE gacha_id=?", [self.id]
-            )
-        ]
+        return list(self.assets.gacha_draw_master.by("gacha_id", self.id))
 
     @property
     def event(self):
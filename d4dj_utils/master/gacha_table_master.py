@@ -4,7 +4,7 @@ from typing import Dict, Any, Tuple
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class GachaTableMaster(MasterAsset):
     id: int
     table_id: int
@@ -12,6 +12,8 @@ class GachaTableMaster(MasterAsset):
     rate: int
 
     db_fields = ["id", "table_id"]
+    index_fields = ["table_id", "card_id"]
+    columnar = True
 
     def __hash__(self):
         return self.id.__hash__()
@@ -4,7 +4,7 @@ from typing import Dict, Any, Tuple
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class GachaTableRateMaster(MasterAsset):
     id: int
     rates: Tuple[int]
@@ -17,6 +17,7 @@ class GachaTableRateMaster(MasterAsset):
 
     def __init__(self, *args):
         self.assets = args[0]
+        self._cache = None
         args = args[1:]
         if len(args) == 5:
             self.id = args[0]
@@ -5,7 +5,7 @@ from d4dj_utils.master.master_asset import MasterAsset
 from d4dj_utils.master.music_mix_master import MusicMixMaster
 
 
-@dataclass
+@dataclass(slots=True)
 class HiddenMusicMixDetailMaster(MasterAsset):
     mix: int
     order: int
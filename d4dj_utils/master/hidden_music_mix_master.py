@@ -5,7 +5,7 @@ from d4dj_utils.master.hidden_music_mix_detail_master import HiddenMusicMixDetai
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class HiddenMusicMixMaster(MasterAsset):
     id: int
     trigger_music_ids: Tuple[int]
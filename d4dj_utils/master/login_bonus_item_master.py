@@ -7,7 +7,7 @@ import msgpack
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class LoginBonusItemMaster(MasterAsset):
     login_bonus_id: int
     sequence: int
@@ -15,6 +15,7 @@ class LoginBonusItemMaster(MasterAsset):
     positions: Sequence[int]
 
     db_fields = ["login_bonus_id", "sequence"]
+    index_fields = ["login_bonus_id"]
 
     def __hash__(self):
         return self.id.__hash__()
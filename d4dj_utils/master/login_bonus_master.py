@@ -7,7 +7,7 @@ import msgpack
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class LoginBonusMaster(MasterAsset):
     id: int
     login_bonus_type_id: int
@@ -45,14 +45,7 @@ class LoginBonusMaster(MasterAsset):
 
     @property
     def items(self):
-        cur = self.assets.db.cursor()
-        return [
-            self.assets.login_bonus_item_master[lbimid]
-            for lbimid in cur.execute(
-                "SELECT login_bonus_id, sequence FROM LoginBonusItemMaster WHERE login_bonus_id=?",
-                [self.id],
-            )
-        ]
+        return list(self.assets.login_bonus_item_master.by("login_bonus_id", self.id))
 
     @property
     def extended_description_items(self) -> Dict[str, str]:
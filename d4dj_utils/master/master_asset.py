@@ -2,8 +2,19 @@ import abc
 import dataclasses
 import datetime
 import textwrap
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
 from pathlib import Path
-from typing import Dict, Any, Iterable, TypeVar, MutableMapping, Optional
+from typing import (
+    Dict,
+    Any,
+    Iterable,
+    TypeVar,
+    MutableMapping,
+    Optional,
+    Tuple,
+    List,
+)
 
 import msgpack
 import pytz as pytz
@@ -16,13 +27,63 @@ except (ImportError, ModuleNotFoundError):
     tools = None
 
 
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def datetime_to_epoch_us(value: datetime.datetime) -> int:
+    """Microseconds since the unix epoch of an aware datetime, so times compare as plain integers."""
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def now_epoch_us() -> int:
+    return datetime_to_epoch_us(datetime.datetime.now(datetime.timezone.utc))
+
+
+class cached_property:
+    """
+    Like functools.cached_property, but stores values in the cache slot of a master asset,
+    so it works on rows without an instance __dict__.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        cache = instance._cache
+        if cache is None:
+            cache = instance._cache = {}
+        if self.name not in cache:
+            cache[self.name] = self.func(instance)
+        return cache[self.name]
+
+
 @dataclasses.dataclass
 class MasterAsset(abc.ABC):
+    # Subclasses are slotted dataclasses, so rows have no instance __dict__.
+    # Cached values are kept in _cache, which is created on first use.
+    __slots__ = ("assets", "_cache", "__weakref__")
+
     asset_manager: "dataclasses.InitVar[am.AssetManager]"
     db_fields = {}
+    # Fields that can be looked up with MasterDict.by and MasterDict.between
+    index_fields = []
+    # Whether rows are stored in columns when the asset manager is created with columnar=True
+    columnar = False
 
     def __post_init__(self, asset_manager):
         self.assets = asset_manager
+        self._cache = None
+
+    def clear_cache(self):
+        """Clears cached values, which may refer to stale rows after a reload."""
+        self._cache = None
 
     def __str__(self):
         if self.one_line_description_items:
@@ -80,18 +141,13 @@ class MasterAsset(abc.ABC):
 
     @property
     def is_released(self):
-        return (
-            self.start_datetime is None
-            or self.start_datetime < datetime.datetime.now(datetime.timezone.utc)
-        )
+        return self.start_epoch_us is None or self.start_epoch_us < now_epoch_us()
 
     @property
     def is_available(self):
         return (
-            self.start_datetime is None
-            or self.start_datetime
-            < datetime.datetime.now(datetime.timezone.utc)
-            < self.end_datetime
+            self.start_epoch_us is None
+            or self.start_epoch_us < now_epoch_us() < self.end_epoch_us
         )
 
     def convert_timestamp(self, timestamp: msgpack.Timestamp):
@@ -102,19 +158,41 @@ class MasterAsset(abc.ABC):
         except OverflowError:
             return self.assets.timezone.localize(datetime.datetime.fromtimestamp(0))
 
+    def _converted_timestamp(
+        self, field: str
+    ) -> Tuple[Optional[datetime.datetime], Optional[int]]:
+        """
+        Returns the localized datetime and epoch microseconds of a timestamp field.
+        Results are kept in the row cache, and recomputed if the field is assigned a different timestamp.
+        """
+        timestamp = getattr(self, field, None)
+        if not isinstance(timestamp, msgpack.Timestamp):
+            return None, None
+        if self._cache is None:
+            self._cache = {}
+        key = ("converted_timestamp", field)
+        cached = self._cache.get(key)
+        if cached is None or cached[0] != timestamp:
+            converted = self.convert_timestamp(timestamp)
+            cached = (timestamp, converted, datetime_to_epoch_us(converted))
+            self._cache[key] = cached
+        return cached[1], cached[2]
+
     @property
     def start_datetime(self) -> Optional[datetime.datetime]:
-        if hasattr(self, "start_date") and isinstance(
-            self.start_date, msgpack.Timestamp
-        ):
-            return self.convert_timestamp(self.start_date)
-        return None
+        return self._converted_timestamp("start_date")[0]
 
     @property
     def end_datetime(self) -> Optional[datetime.datetime]:
-        if hasattr(self, "end_date") and isinstance(self.end_date, msgpack.Timestamp):
-            return self.convert_timestamp(self.end_date)
-        return None
+        return self._converted_timestamp("end_date")[0]
+
+    @property
+    def start_epoch_us(self) -> Optional[int]:
+        return self._converted_timestamp("start_date")[1]
+
+    @property
+    def end_epoch_us(self) -> Optional[int]:
+        return self._converted_timestamp("end_date")[1]
 
     def as_tuple(self):
         return dataclasses.astuple(self)
@@ -132,8 +210,149 @@ class MasterDict(dict, MutableMapping[KT, VT]):
     def __init__(self, base: Dict[Any, MasterAsset], name: str, path: Path):
         self.path = path
         self.name = name
+        self._hash_indexes: Dict[str, Dict[Any, Tuple[VT, ...]]] = {}
+        self._sorted_indexes: Dict[str, Tuple[List[Any], List[VT]]] = {}
+        self._date_columns: Optional[List[Tuple[Optional[int], Optional[int], VT]]] = (
+            None
+        )
         super().__init__(base)
 
+    def _clear_indexes(self):
+        self._hash_indexes.clear()
+        self._sorted_indexes.clear()
+        self._date_columns = None
+
+    def __setitem__(self, key, value):
+        self._clear_indexes()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._clear_indexes()
+        super().__delitem__(key)
+
+    def __ior__(self, other):
+        self._clear_indexes()
+        return super().__ior__(other)
+
+    def clear(self):
+        self._clear_indexes()
+        super().clear()
+
+    def update(self, *args, **kwargs):
+        self._clear_indexes()
+        super().update(*args, **kwargs)
+
+    def pop(self, *args):
+        self._clear_indexes()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._clear_indexes()
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self._clear_indexes()
+        return super().setdefault(key, default)
+
+    def replace(self, values: Dict[Any, MasterAsset]):
+        """Replaces all values of this master, as done when reloading it."""
+        self.clear()
+        self.update(values)
+
+    def _check_index_field(self, field: str):
+        if not self:
+            return
+        if field not in next(iter(self.values())).index_fields:
+            raise KeyError(f"{field} is not an indexed field of {self.name}.")
+
+    def by(self, field: str, value) -> Tuple[VT, ...]:
+        """
+        Returns the values whose field is equal to the given value, in master order.
+        Fields holding tuples are indexed by each of their elements.
+        The index for a field is built on first use.
+        """
+        if field not in self._hash_indexes:
+            self._check_index_field(field)
+            index = defaultdict(list)
+            for item in self.values():
+                field_value = getattr(item, field)
+                if isinstance(field_value, (tuple, list)):
+                    for element in dict.fromkeys(field_value):
+                        index[element].append(item)
+                else:
+                    index[field_value].append(item)
+            self._hash_indexes[field] = {k: tuple(v) for k, v in index.items()}
+        return self._hash_indexes[field].get(value, ())
+
+    def between(self, field: str, start=None, end=None) -> List[VT]:
+        """
+        Returns the values whose field is within [start, end], sorted by that field.
+        Either bound may be None to leave that side open.
+        Works on numeric and timestamp fields. Bounds for timestamp fields may be timestamps or aware datetimes,
+        which compare like start_datetime and end_datetime. Values where the field is None are skipped.
+        """
+        if field not in self._sorted_indexes:
+            self._check_index_field(field)
+            entries = sorted(
+                (
+                    (self._sort_key(getattr(item, field)), item)
+                    for item in self.values()
+                    if getattr(item, field) is not None
+                ),
+                key=lambda entry: entry[0],
+            )
+            self._sorted_indexes[field] = (
+                [key for key, _item in entries],
+                [item for _key, item in entries],
+            )
+        keys, items = self._sorted_indexes[field]
+        if not items:
+            return []
+        start_index = 0 if start is None else bisect_left(keys, self._sort_key(start))
+        end_index = (
+            len(keys) if end is None else bisect_right(keys, self._sort_key(end))
+        )
+        return items[start_index:end_index]
+
+    def _sort_key(self, value):
+        """Orders timestamps and datetimes by epoch microseconds, as in start_epoch_us, and other values as they are."""
+        if isinstance(value, msgpack.Timestamp):
+            value = next(iter(self.values())).convert_timestamp(value)
+        if isinstance(value, datetime.datetime):
+            return datetime_to_epoch_us(value)
+        return value
+
+    def _get_date_columns(self) -> List[Tuple[Optional[int], Optional[int], VT]]:
+        if self._date_columns is None:
+            self._date_columns = [
+                (item.start_epoch_us, item.end_epoch_us, item) for item in self.values()
+            ]
+        return self._date_columns
+
+    def released_at(self, time: Optional[datetime.datetime] = None) -> List[VT]:
+        """
+        Returns the values released before the given time, or now if no time is given, in master order.
+        Values without a start date count as released.
+        """
+        epoch = now_epoch_us() if time is None else datetime_to_epoch_us(time)
+        return [
+            item
+            for start, _end, item in self._get_date_columns()
+            if start is None or start < epoch
+        ]
+
+    def available_at(self, time: Optional[datetime.datetime] = None) -> List[VT]:
+        """
+        Returns the values available at the given time, or now if no time is given, in master order.
+        Values without a start date count as available.
+        """
+        epoch = now_epoch_us() if time is None else datetime_to_epoch_us(time)
+        return [
+            item
+            for start, end, item in self._get_date_columns()
+            if start is None or start < epoch < end
+        ]
+
     def formatted(self, filter_function=None, sort_key=None):
         values: Iterable[MasterAsset]
         if filter_function:
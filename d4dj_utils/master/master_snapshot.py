@@ -0,0 +1,82 @@
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import msgpack
+
+from d4dj_utils.packed_file import PackedFile, write_packed_file
+
+Signature = Tuple[Tuple[str, int, int], ...]
+
+
+def file_signature(paths: Sequence[Path]) -> Signature:
+    """Identifies the current version of a set of files by their names, mtimes and sizes."""
+    return tuple(
+        sorted(
+            (path.name, stat.st_mtime_ns, stat.st_size)
+            for path, stat in ((path, path.stat()) for path in paths)
+        )
+    )
+
+
+class MasterSnapshot:
+    """
+    Cache of decoded master rows, stored in a single memory-mapped file.
+    Each entry is keyed by master name and tagged with the name, mtime and size of its source files,
+    so an entry is only used while none of the files it was decoded from have changed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._file: Optional[PackedFile] = None
+        self._pending: Dict[str, Tuple[Signature, bytes]] = {}
+        if self.path.exists():
+            try:
+                self._file = PackedFile(self.path)
+            except (ValueError, OSError):
+                self.logger.warning(f'Ignoring unreadable snapshot "{self.path}".')
+
+    def get(self, name: str, signature: Signature) -> Optional[Dict[Any, tuple]]:
+        if name in self._pending:
+            pending_signature, payload = self._pending[name]
+            if pending_signature == signature:
+                return msgpack.unpackb(payload, strict_map_key=False, use_list=False)
+            return None
+        if self._file is None or name not in self._file:
+            return None
+        if self._file.metadata(name) != signature:
+            return None
+        return msgpack.unpackb(
+            self._file.get(name), strict_map_key=False, use_list=False
+        )
+
+    def put(self, name: str, signature: Signature, data: Dict[Any, tuple]):
+        self._pending[name] = (signature, msgpack.packb(data))
+
+    def save(self):
+        if not self._pending:
+            return
+        entries = {}
+        if self._file is not None:
+            entries = {
+                name: (metadata, bytes(payload))
+                for name, metadata, payload in self._file.entries()
+            }
+            self._file.close()
+            self._file = None
+        entries.update(self._pending)
+        try:
+            write_packed_file(
+                self.path,
+                (
+                    (name, signature, payload)
+                    for name, (signature, payload) in entries.items()
+                ),
+            )
+            self._pending = {}
+            self.logger.debug(f'Saved master snapshot to "{self.path}".')
+        except OSError:
+            self.logger.warning(f'Failed to save master snapshot to "{self.path}".')
+        if self.path.exists():
+            self._file = PackedFile(self.path)
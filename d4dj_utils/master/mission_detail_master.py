@@ -4,7 +4,7 @@ from typing import Dict, Any, Tuple
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class MissionDetailMaster(MasterAsset):
     id: int
     panel_id: int
@@ -7,7 +7,7 @@ import msgpack
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class MissionGroupMaster(MasterAsset):
     id: int
     category_id: int
@@ -3,14 +3,15 @@ import json
 import wave
 from dataclasses import dataclass
 from enum import Enum
-from functools import cached_property
+from pathlib import Path
 from typing import Dict, Any, Tuple, Optional
 
 import msgpack
 
 from d4dj_utils.master.chart_master import ChartDifficulty
 from d4dj_utils.master.common_enums import ChartSectionType
-from d4dj_utils.master.master_asset import MasterAsset
+from d4dj_utils.master.master_asset import MasterAsset, cached_property
+from d4dj_utils.master.master_snapshot import file_signature
 
 try:
     from d4dj_utils.extended.tools.tools import vgmstream
@@ -18,7 +19,7 @@ except (ImportError, ModuleNotFoundError):
     vgmstream = None
 
 
-@dataclass
+@dataclass(slots=True)
 class MusicMaster(MasterAsset):
     id: int
     name: str
@@ -83,19 +84,43 @@ class MusicMaster(MasterAsset):
     def audio_path(self):
         return self.assets.path / f"plain/music/music_{str(self.id).zfill(7)}.acb"
 
+    @property
+    def duration_path(self) -> Path:
+        return self.audio_path.with_name(self.audio_path.name + ".json")
+
     @cached_property
     def duration(self) -> Optional[float]:
+        """
+        Duration in seconds from the audio metadata file. The value is cached, and is only refreshed
+        when check_duration_file finds that the file changed, as done when building chart cache keys.
+        """
+        self._cache["duration_signature"] = self._duration_file_signature()
         try:
-            with open(
-                self.audio_path.with_name(self.audio_path.name + ".json"),
-                "r",
-                encoding="utf-8",
-            ) as f:
+            with open(self.duration_path, "r", encoding="utf-8") as f:
                 audio_data = json.load(f)
                 return audio_data["sampleCount"] / audio_data["sampleRate"]
         except:
             return None
 
+    def check_duration_file(self) -> Optional[Tuple[str, int, int]]:
+        """
+        Returns the signature of the audio metadata file, or None if it does not exist,
+        clearing the cached duration if the file changed since the duration was read.
+        """
+        signature = self._duration_file_signature()
+        if self._cache is None:
+            self._cache = {}
+        if self._cache.get("duration_signature", signature) != signature:
+            self._cache.pop("duration", None)
+        self._cache["duration_signature"] = signature
+        return signature
+
+    def _duration_file_signature(self) -> Optional[Tuple[str, int, int]]:
+        try:
+            return file_signature([self.duration_path])[0]
+        except OSError:
+            return None
+
     def decode_audio(self):
         # This doesn't decrypt, but we only need durations from the resulting wav
         vgmstream(self.audio_path)
@@ -5,7 +5,7 @@ from d4dj_utils.master.common_enums import ChartSectionType
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class MusicMixMaster(MasterAsset):
     music_id: int
     section_id: int
@@ -4,7 +4,7 @@ from d4dj_utils.master.common_enums import ParameterBonus
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class ParameterBonusMaster(MasterAsset):
     id: int
     target_id: int
@@ -6,7 +6,7 @@ from d4dj_utils.master.character_master import CharacterMaster
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class PassiveSkillMaster(MasterAsset):
     id: int
     type_id: int
@@ -6,7 +6,7 @@ from d4dj_utils.master.master_asset import MasterAsset
 
 
 @total_ordering
-@dataclass
+@dataclass(slots=True)
 class RarityMaster(MasterAsset):
     id: int
     max_levels: Tuple[int]
@@ -0,0 +1,42 @@
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+import msgpack
+
+
+class RenderManifest:
+    """
+    Record of the inputs each rendered image was created from, as a digest per image.
+    An image only needs to be rendered again if the digest of its current inputs differs from the recorded one.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self.entries: Dict[str, str] = {}
+        self._modified = False
+        if self.path.exists():
+            try:
+                self.entries = msgpack.unpackb(self.path.read_bytes())
+            except (ValueError, OSError):
+                self.logger.warning(
+                    f'Ignoring unreadable render manifest "{self.path}".'
+                )
+
+    def get(self, name: str) -> Optional[str]:
+        return self.entries.get(name)
+
+    def __setitem__(self, name: str, digest: str):
+        if self.entries.get(name) != digest:
+            self.entries[name] = digest
+            self._modified = True
+
+    def save(self):
+        if not self._modified:
+            return
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        temp_path.write_bytes(msgpack.packb(self.entries))
+        os.replace(temp_path, self.path)
+        self._modified = False
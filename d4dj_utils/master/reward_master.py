@@ -5,7 +5,7 @@ from d4dj_utils.master.common_enums import RewardCategory
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class RewardMaster(MasterAsset):
     id: int
     reward_category_id: int
@@ -0,0 +1,91 @@
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, Optional
+
+from d4dj_utils.packed_file import PackedEntry, PackedFile, write_packed_file
+
+
+class ScoringTableStore:
+    """
+    Directory of serialized chart scoring tables, one file per key.
+    Keys should identify the inputs of a table, such as a digest of the chart files and skill durations,
+    so stored tables never need to be invalidated.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.path / f"{key}.msgpack"
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self._entry_path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, data: bytes):
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+
+    def discard(self, key: str):
+        """Removes an entry, such as one that could not be read."""
+        self.logger.warning(f'Discarding unreadable scoring table "{key}".')
+        self._entry_path(key).unlink(missing_ok=True)
+
+
+def write_scoring_tables(path: Path, entries: Iterable[PackedEntry]) -> int:
+    """
+    Writes (key, metadata, serialized table) entries to a single packed file, as read by ScoringTables.
+    Returns the number of tables written.
+    """
+    count = 0
+
+    def counted():
+        nonlocal count
+        for entry in entries:
+            count += 1
+            yield entry
+
+    write_packed_file(path, counted())
+    return count
+
+
+class ScoringTables:
+    """
+    Memory-mapped file of precomputed chart scoring tables, written by write_scoring_tables.
+    Uses the same keys as ScoringTableStore, so tables for charts that changed since it was written are not found.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._file: Optional[PackedFile] = None
+        if self.path.exists():
+            try:
+                self._file = PackedFile(self.path)
+            except (ValueError, OSError):
+                self.logger.warning(
+                    f'Ignoring unreadable scoring tables "{self.path}".'
+                )
+
+    def __contains__(self, key: str):
+        return self._file is not None and key in self._file
+
+    def __len__(self):
+        return len(self._file) if self._file is not None else 0
+
+    def get(self, key: str) -> Optional[memoryview]:
+        if self._file is None:
+            return None
+        return self._file.get(key)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
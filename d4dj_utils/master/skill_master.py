@@ -4,7 +4,7 @@ from typing import Dict, Any, Tuple
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class SkillMaster(MasterAsset):
     id: int = 0
     min_recovery_value: int = 0
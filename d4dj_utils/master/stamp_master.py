@@ -6,7 +6,7 @@ from typing import Dict, Any, Tuple
 from d4dj_utils.master.master_asset import MasterAsset
 
 
-@dataclass
+@dataclass(slots=True)
 class StampMaster(MasterAsset):
     id: int
     category_id: int
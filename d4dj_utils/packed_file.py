@@ -0,0 +1,109 @@
+import mmap
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+import msgpack
+
+MAGIC = b"D4PK"
+HEADER_SIZE_BYTES = 8
+
+PackedEntry = Tuple[Any, Any, Union[bytes, memoryview]]
+
+
+def write_packed_file(path: Union[str, Path], entries: Iterable[PackedEntry]):
+    """
+    Writes (key, metadata, payload) entries to a single file with an offset table.
+    Payloads are spooled to a temporary file as entries are produced, since the offset table is written first,
+    so only the table is held in memory.
+    The file is written to a temporary path first, then moved into place.
+    """
+    path = Path(path)
+    index = {}
+    offset = 0
+    with tempfile.TemporaryFile(dir=path.parent) as payloads:
+        for key, metadata, payload in entries:
+            index[key] = (offset, len(payload), metadata)
+            payloads.write(payload)
+            offset += len(payload)
+        header = msgpack.packb(index)
+        temp_path = path.with_name(path.name + ".tmp")
+        with temp_path.open("wb") as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(HEADER_SIZE_BYTES, byteorder="little"))
+            f.write(header)
+            payloads.seek(0)
+            shutil.copyfileobj(payloads, f)
+    os.replace(temp_path, path)
+
+
+class PackedFile:
+    """
+    Memory-mapped reader for files written by write_packed_file.
+    Payloads are returned as memoryviews into the mapping, so no copies are made.
+    Views remain valid after close; the mapping is unmapped once the last of them is released.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view: Optional[memoryview] = memoryview(self._mmap)
+        if self._view[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f'"{self.path}" is not a packed file.')
+        header_start = len(MAGIC) + HEADER_SIZE_BYTES
+        header_size = int.from_bytes(
+            self._view[len(MAGIC) : header_start], byteorder="little"
+        )
+        self._data_start = header_start + header_size
+        self.index: Dict[Any, Tuple[int, int, Any]] = msgpack.unpackb(
+            self._view[header_start : self._data_start],
+            strict_map_key=False,
+            use_list=False,
+        )
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def keys(self):
+        return self.index.keys()
+
+    def metadata(self, key) -> Any:
+        return self.index[key][2]
+
+    def get(self, key) -> Optional[memoryview]:
+        if key not in self.index:
+            return None
+        offset, size, _metadata = self.index[key]
+        start = self._data_start + offset
+        return self._view[start : start + size]
+
+    def entries(self) -> Iterable[PackedEntry]:
+        for key, (_offset, _size, metadata) in self.index.items():
+            yield key, metadata, self.get(key)
+
+    def close(self):
+        """Closes the file, after which it has no entries. Does nothing if it is already closed."""
+        if self._view is None:
+            return
+        view, mapping = self._view, self._mmap
+        self._view = self._mmap = None
+        self.index = {}
+        try:
+            view.release()
+            mapping.close()
+        except BufferError:
+            # Payload views are still held, and keep the mapping alive until they are released
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
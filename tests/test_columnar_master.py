@@ -0,0 +1,51 @@
+import random
+from pathlib import Path
+from types import SimpleNamespace
+
+import msgpack
+import pytest
+
+from d4dj_utils.master.card_master import CardMaster
+from d4dj_utils.master.columnar_master import ColumnarMasterDict
+
+
+def _cards(seed: int, count: int, parameter_counts=(3,)):
+    rng = random.Random(seed)
+    assets = SimpleNamespace()
+    timestamp = msgpack.Timestamp(1600000000)
+    return {
+        card_id: CardMaster(
+            assets,
+            card_id,
+            rng.randint(1, 4),
+            f"card {card_id}",
+            rng.randint(1, 4),
+            rng.randint(1, 30),
+            card_id,
+            f"skill {card_id}",
+            card_id,
+            tuple(
+                rng.randint(1000, 12000) for _ in range(rng.choice(parameter_counts))
+            ),
+            "",
+            card_id,
+            card_id,
+            (0, 0),
+            (0, 0),
+            timestamp,
+            timestamp,
+        )
+        for card_id in rng.sample(range(100000, 200000), count)
+    }
+
+
+@pytest.mark.parametrize("parameter_counts", [(3,), (2, 3)])
+def test_max_powers_match_rows(parameter_counts):
+    cards = _cards(0, 200, parameter_counts)
+    master = ColumnarMasterDict(cards, "CardMaster", Path())
+    assert master.max_powers().tolist() == [card.max_power for card in cards.values()]
+    assert [card.max_power for card in master.values()] == master.max_powers().tolist()
+
+
+def test_max_powers_empty():
+    assert ColumnarMasterDict({}, "CardMaster", Path()).max_powers().tolist() == []
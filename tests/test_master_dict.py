@@ -0,0 +1,75 @@
+import datetime
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+
+import msgpack
+import pytz
+
+from d4dj_utils.master.master_asset import MasterAsset, MasterDict
+
+
+@dataclass(slots=True)
+class _EventRow(MasterAsset):
+    id: int
+    start_date: msgpack.Timestamp
+    point: int
+
+    index_fields = ["start_date", "point"]
+
+
+def _master():
+    assets = SimpleNamespace(timezone=pytz.timezone("Asia/Tokyo"))
+    base = datetime.datetime(2022, 1, 1)
+    rows = [
+        _EventRow(
+            assets,
+            i,
+            msgpack.Timestamp.from_datetime(
+                (base + datetime.timedelta(days=i)).replace(
+                    tzinfo=datetime.timezone.utc
+                )
+            ),
+            (i * 7) % 10,
+        )
+        for i in range(10)
+    ]
+    return MasterDict({row.id: row for row in rows}, "EventRowMaster", Path())
+
+
+def test_between_numbers():
+    master = _master()
+    assert [row.point for row in master.between("point", 2, 5)] == [2, 3, 4, 5]
+    assert [row.point for row in master.between("point", end=1)] == [0, 1]
+
+
+def test_between_timestamps_and_datetimes():
+    master = _master()
+    rows = list(master.values())
+    start, end = rows[3], rows[6]
+    expected = [3, 4, 5, 6]
+    assert [
+        row.id for row in master.between("start_date", start.start_date, end.start_date)
+    ] == expected
+    assert [
+        row.id
+        for row in master.between(
+            "start_date", start.start_datetime, end.start_datetime
+        )
+    ] == expected
+    # Datetimes in other time zones compare by the instant they refer to
+    assert [
+        row.id
+        for row in master.between(
+            "start_date",
+            start.start_datetime.astimezone(datetime.timezone.utc),
+            end.start_datetime - datetime.timedelta(microseconds=1),
+        )
+    ] == expected[:-1]
+
+
+def test_between_empty():
+    master = MasterDict({}, "EventRowMaster", Path())
+    assert (
+        master.between("start_date", datetime.datetime.now(datetime.timezone.utc)) == []
+    )
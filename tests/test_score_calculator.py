@@ -0,0 +1,442 @@
+import dataclasses
+import math
+import random
+from collections import defaultdict
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from d4dj_utils.chart import score_calculator
+from d4dj_utils.chart.chart import Chart, ChartInfo
+from d4dj_utils.chart.score_calculator import (
+    ChartScoringData,
+    ChartScoringTable,
+    ScoringDataEntry,
+    Timeline,
+    autoplay_multiplier,
+    calculate_score,
+    combo_multipliers,
+    disable_soflan_multiplier,
+    f32,
+    get_chart_scoring_data,
+    get_chart_scoring_table,
+)
+from d4dj_utils.chart.synthetic import synthetic_chart
+
+
+def _chart(seed: int, note_count: int) -> Chart:
+    """A synthetic chart with a random layout of skills and fever."""
+    rng = random.Random(seed)
+    chart = synthetic_chart(note_count, seed, max_gap=0.3, max_hold_length=4)
+
+    # Skill and fever changes sometimes fall exactly on a note
+    note_times = chart.arrays.times.tolist()
+    end_time = max(note_times) + 1
+
+    def event_time():
+        return rng.choice([rng.uniform(0, end_time), rng.choice(note_times)])
+
+    skill_times = sorted(event_time() for _ in range(5))
+    fever_start = event_time()
+    fever_end = rng.choice([fever_start + rng.uniform(0, 30), event_time()])
+    info = ChartInfo(
+        0.0,
+        end_time,
+        skill_times,
+        fever_start,
+        fever_end,
+        rng.choice([5.0, 20.5, 27.0, 31.5]),
+        [],
+        [],
+    )
+    return dataclasses.replace(chart, info=info)
+
+
+def _skills(rng: random.Random):
+    return [
+        SimpleNamespace(
+            max_seconds=rng.choice([5.0, 7.0, 8.5, 9.0, float(rng.randint(1, 12))]),
+            score_up_rate=rng.choice([0, 50, 60, 115.5, 120]),
+            perfect_score_up_rate=rng.choice([0, 7.5, 10, 15]),
+        )
+        for _ in range(5)
+    ]
+
+
+def _timeline_score(
+    chart: Chart,
+    power: int,
+    skills,
+    enable_fever: bool = True,
+    accuracy: float = 1.0,
+    disable_soflan: bool = False,
+    autoplay: bool = False,
+    enable_combo_bonus: bool = True,
+):
+    """calculate_score as it was implemented before vectorization, with a Timeline callback per note."""
+    if autoplay:
+        enable_combo_bonus = False
+
+    timeline = Timeline()
+    timeline.active_skill_index = -1
+    timeline.score = 0
+    timeline.combo = 0
+    timeline.fever_active = False
+    timeline.fever_multiplier = 1.0
+
+    base_score = (1 + 0.01 * (chart.info.level - 5)) * power * 3 / len(chart.notes)
+
+    def add_skill_callback(index: int, time: float):
+        def start_cb(_tl):
+            timeline.active_skill_index = index
+
+        def end_cb(_tl):
+            if timeline.active_skill_index == index:
+                timeline.active_skill_index = -1
+
+        timeline.add(time, start_cb)
+        timeline.add(time + skills[index].max_seconds, end_cb)
+
+    for index, skill_bar in enumerate(chart.info.skill_times):
+        add_skill_callback(index, skill_bar)
+
+    if enable_fever:
+
+        def enable_fever_cb(_tl):
+            timeline.fever_active = True
+
+        def disable_fever_cb(_tl):
+            timeline.fever_active = False
+
+        timeline.add(chart.info.fever_start, enable_fever_cb)
+        timeline.add(chart.info.fever_end, disable_fever_cb)
+
+        times = chart.arrays.times
+        if n_fever_notes := int(
+            ((chart.info.fever_start <= times) & (times < chart.info.fever_end)).sum()
+        ):
+            fever_note_fraction = n_fever_notes / len(chart.notes)
+            fever_multiplier = (0.28 / fever_note_fraction) ** 0.6
+            timeline.fever_multiplier = max(1.1, min(2 * fever_multiplier, 5.0))
+
+    base_multiplier = 1
+    if disable_soflan:
+        base_multiplier *= disable_soflan_multiplier
+    if autoplay:
+        base_multiplier *= autoplay_multiplier
+
+    def add_note_callback(time: float):
+        def note_cb(_tl):
+            multiplier = base_multiplier
+            if enable_combo_bonus:
+                multiplier *= combo_multipliers[min(timeline.combo, 700)]
+            if timeline.fever_active:
+                multiplier *= timeline.fever_multiplier
+
+            skill = (
+                skills[timeline.active_skill_index]
+                if timeline.active_skill_index != -1
+                else None
+            )
+            if autoplay:
+                if skill is not None:
+                    timeline.score += math.floor(
+                        multiplier * (1 + skill.score_up_rate / 100) * base_score
+                    )
+                else:
+                    timeline.score += math.floor(multiplier * base_score)
+            else:
+                if skill is not None:
+                    timeline.score += accuracy * math.floor(
+                        base_score
+                        * multiplier
+                        * (
+                            1
+                            + skill.perfect_score_up_rate / 100
+                            + skill.score_up_rate / 100
+                        )
+                    )
+                    timeline.score += (1 - accuracy) * math.floor(
+                        0.9 * base_score * multiplier * (1 + skill.score_up_rate / 100)
+                    )
+                else:
+                    timeline.score += accuracy * math.floor(base_score * multiplier)
+                    timeline.score += (1 - accuracy) * math.floor(
+                        0.9 * base_score * multiplier
+                    )
+                timeline.combo += 1
+
+        timeline.add(time, note_cb)
+
+    for time in chart.arrays.times.tolist():
+        add_note_callback(time)
+
+    timeline.run()
+    return timeline.score
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_calculate_score_matches_timeline(seed):
+    rng = random.Random(seed)
+    chart = _chart(seed, rng.choice([50, 400, 1200]))
+    for _ in range(12):
+        skills = _skills(rng)
+        options = dict(
+            enable_fever=rng.random() < 0.8,
+            accuracy=rng.choice([1.0, 0.987, 0.95, 0.5, 0.0]),
+            disable_soflan=rng.random() < 0.3,
+            autoplay=rng.random() < 0.3,
+            enable_combo_bonus=rng.random() < 0.8,
+        )
+        power = rng.randint(10000, 400000)
+        expected = _timeline_score(chart, power, skills, **options)
+        result = calculate_score(chart, power, skills, **options)
+        assert result == expected, options
+        assert type(result) is type(expected), options
+
+
+def _timeline_scoring_table(chart: Chart, skill_durations) -> ChartScoringTable:
+    """get_chart_scoring_table as it was implemented before vectorization, with a Timeline callback per note."""
+    tl = Timeline()
+    tl.active_skills = set()
+    tl.combo = 0
+    tl.fever_active = False
+
+    data = defaultdict(int)
+
+    def add_skill_callback(index: int, time: float):
+        def start_cb(_tl):
+            tl.active_skills.add(index)
+
+        def end_cb(_tl):
+            tl.active_skills.remove(index)
+
+        tl.add(time, start_cb)
+        tl.add(time + skill_durations[index], end_cb)
+
+    for index, skill_bar in enumerate(chart.info.skill_times):
+        add_skill_callback(index, skill_bar)
+
+    def enable_fever_cb(_tl):
+        tl.fever_active = True
+
+    def disable_fever_cb(_tl):
+        tl.fever_active = False
+
+    tl.add(chart.info.fever_start, enable_fever_cb)
+    tl.add(chart.info.fever_end, disable_fever_cb)
+
+    times = chart.arrays.times
+    fever_multiplier = 1.0
+    if n_fever_notes := int(
+        np.count_nonzero(
+            (chart.info.fever_start <= times) & (times < chart.info.fever_end)
+        )
+    ):
+        fever_note_fraction = f32(n_fever_notes / len(chart.notes))
+        fever_multiplier = f32(f32(0.28 / fever_note_fraction) ** 0.6)
+        fever_multiplier = f32(max(1.1, min(2 * fever_multiplier, 5.0)))
+
+    def add_note_callback(time: float):
+        def note_cb(_tl):
+            entry = ScoringDataEntry(
+                fever_active=tl.fever_active,
+                combo_multiplier=combo_multipliers[min(tl.combo, 700)],
+                skills=tuple(sorted(tl.active_skills)),
+            )
+            data[entry] += 1
+            tl.combo += 1
+
+        tl.add(time, note_cb)
+
+    for time in times.tolist():
+        add_note_callback(time)
+
+    tl.run()
+    return ChartScoringTable(
+        chart.info.level, len(chart.notes), fever_multiplier, dict(data)
+    )
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_scoring_table_matches_timeline(seed):
+    rng = random.Random(seed)
+    chart = _chart(seed, rng.choice([50, 400, 1200]))
+    skill_times = chart.info.skill_times
+    for _ in range(12):
+        # Durations sometimes end a skill exactly when another skill starts
+        skill_durations = [
+            rng.choice(
+                [5.0, 7.0, 8.5, 9.0, rng.uniform(0, 12)]
+                + [later - start for later in skill_times if later > start]
+            )
+            for start in skill_times
+        ]
+        expected = _timeline_scoring_table(chart, skill_durations)
+        result = get_chart_scoring_table(chart, skill_durations)
+        assert result == expected, skill_durations
+        # Entries are in the same order, so stored tables are identical
+        assert list(result.data) == list(expected.data), skill_durations
+        assert result.to_msgpack() == expected.to_msgpack(), skill_durations
+
+
+def _scalar_score(
+    scoring_data: ChartScoringData,
+    power: int,
+    skills,
+    fever_score_up: float = 0.0,
+    passive_score_up: float = 0.0,
+    auto_score_up: float = 0.0,
+    manual_score_up: float = 0.0,
+    enable_fever: bool = True,
+    disable_soflan: bool = False,
+    autoplay: bool = False,
+    accuracy: float = 1.0,
+    combo_bonus_multiplier=1.0,
+):
+    """ChartScoringData.score as it was implemented before vectorization, with f32 applied per entry."""
+    if autoplay:
+        combo_bonus_multiplier = 0.0
+    else:
+        combo_bonus_multiplier = f32(combo_bonus_multiplier)
+    base_score = scoring_data.base_score(power)
+    fever_multiplier = (
+        f32(scoring_data.fever_multiplier * f32(1.0 + fever_score_up))
+        if enable_fever
+        else 1.0
+    )
+    total_score = 0
+    for (
+        fever_active,
+        combo_multiplier,
+        active_skills,
+    ), count in scoring_data.data.items():
+        active_skills = [skills[i] for i in active_skills]
+        score_up_rate = sum(s.score_up_rate for s in active_skills)
+        if autoplay:
+            perfect_score_up_rate = 0
+        else:
+            perfect_score_up_rate = sum(s.perfect_score_up_rate for s in active_skills)
+        if accuracy == 1.0:
+            multiplier = f32(f32((score_up_rate + perfect_score_up_rate) * 0.01) + 1.0)
+        else:
+            perfect_multiplier = (score_up_rate + perfect_score_up_rate) * 0.01 + 1.0
+            great_multiplier = (score_up_rate * 0.01 + 1.0) * 0.9
+            multiplier = (
+                accuracy * perfect_multiplier + (1 - accuracy) * great_multiplier
+            )
+        if fever_active:
+            multiplier = f32(multiplier * fever_multiplier)
+        if disable_soflan:
+            multiplier = f32(multiplier * disable_soflan_multiplier)
+        multiplier = f32(multiplier * f32(1.0 + passive_score_up))
+        if autoplay:
+            multiplier = f32(
+                f32(multiplier * f32(1.0 + auto_score_up)) * autoplay_multiplier
+            )
+        else:
+            multiplier = f32(multiplier * f32(1.0 + manual_score_up))
+        combo_multiplier = f32(
+            f32(f32(combo_multiplier - 1.0) * combo_bonus_multiplier) + 1.0
+        )
+        score = math.floor(f32(f32(combo_multiplier * base_score) * multiplier))
+        total_score += score * count
+    return total_score
+
+
+def _teams(rng: random.Random, count: int):
+    return [
+        [
+            SimpleNamespace(
+                score_up_rate=rng.choice([0, 0.1, 33.3, 50, 60, 115.5, 120]),
+                perfect_score_up_rate=rng.choice([0, 0.3, 7.5, 10, 15]),
+            )
+            for _ in range(5)
+        ]
+        for _ in range(count)
+    ]
+
+
+def _score_options(rng: random.Random):
+    return dict(
+        fever_score_up=rng.choice([0.0, 0.1, 0.33]),
+        passive_score_up=rng.choice([0.0, 0.2, 0.777]),
+        auto_score_up=rng.choice([0.0, 0.15]),
+        manual_score_up=rng.choice([0.0, 0.123, 0.3]),
+        enable_fever=rng.random() < 0.8,
+        disable_soflan=rng.random() < 0.3,
+        autoplay=rng.random() < 0.3,
+        accuracy=rng.choice([1.0, 1.0, 0.95, 0.5]),
+        combo_bonus_multiplier=rng.choice([1.0, True, False, 0.3, 1.7]),
+    )
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_score_matches_scalar(seed):
+    rng = random.Random(seed)
+    chart = _chart(seed, rng.choice([50, 400, 1200]))
+    scoring_data = get_chart_scoring_data(
+        chart, [rng.choice([5.0, 7.0, 8.5, 9.0]) for _ in range(5)]
+    )
+    for _ in range(8):
+        options = _score_options(rng)
+        teams = _teams(rng, 16)
+        # Repeated powers share a base score in score_many
+        powers = [
+            rng.choice([10000, 123456, rng.randint(10000, 400000)]) for _ in teams
+        ]
+        expected = [
+            _scalar_score(scoring_data, power, skills, **options)
+            for power, skills in zip(powers, teams)
+        ]
+
+        for power, skills, score in zip(powers, teams, expected):
+            result = scoring_data.score(power, skills, **options)
+            assert result == score, options
+            assert type(result) is int, options
+
+        skill_matrix = np.array(
+            [
+                [[s.score_up_rate, s.perfect_score_up_rate] for s in skills]
+                for skills in teams
+            ]
+        )
+        assert (
+            scoring_data.score_many(powers, skill_matrix, **options).tolist()
+            == expected
+        ), options
+
+
+def test_score_many_chunks(monkeypatch):
+    rng = random.Random(0)
+    chart = _chart(0, 400)
+    scoring_data = get_chart_scoring_data(chart, [7.0] * 5)
+    teams = _teams(rng, 10)
+    powers = [rng.randint(10000, 400000) for _ in teams]
+    skill_matrix = np.array(
+        [
+            [[s.score_up_rate, s.perfect_score_up_rate] for s in skills]
+            for skills in teams
+        ]
+    )
+    expected = [
+        _scalar_score(scoring_data, power, skills)
+        for power, skills in zip(powers, teams)
+    ]
+    # Small enough that teams are scored a few at a time
+    monkeypatch.setattr(
+        score_calculator, "_score_chunk_elements", 3 * len(scoring_data.data)
+    )
+    assert scoring_data.score_many(powers, skill_matrix).tolist() == expected
+
+
+def test_score_missing_skills():
+    chart = _chart(0, 400)
+    scoring_data = get_chart_scoring_data(chart, [7.0] * 5)
+    skills = _teams(random.Random(0), 1)[0]
+    scoring_data.score(250000, skills)
+    with pytest.raises(IndexError):
+        scoring_data.score(250000, skills[:4])
+    with pytest.raises(IndexError):
+        scoring_data.score_many([250000], np.zeros((1, 4, 2)))